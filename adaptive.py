@@ -0,0 +1,210 @@
+"""
+Adaptive particle resolution.
+
+adapt_resolution() merges pairs of calm particles in the dense interior of the
+fluid into one heavier particle and splits heavy particles again once they reach
+the free surface or a splash. Density, pressure and viscosity in physics.py and
+array_physics.py are mass weighted, so a merged particle stands in for both of
+its parts.
+
+Merging keeps the total mass, the centre of mass and the momentum (positions and
+velocities are mass weighted averages). Splitting places two halves symmetrically
+around the parent with the parent's velocity, which keeps the same quantities.
+
+A merged pair no longer sees itself as neighbours, so the merged particle records
+the pair's kernel value in self_kernel and calculate_density adds it back, and
+its viscous impulses stand for those of both parts. Its density, and the settled
+height of the fluid, stay those of the particles it replaces.
+
+The merge and split thresholds are apart (hysteresis) so a particle on the
+boundary of a calm region does not merge and split on alternate calls.
+
+    particles = update(particles, dam)
+    if frame % 10 == 0:
+        particles = adapt_resolution(particles)
+"""
+
+from array import array
+from math import hypot, sqrt
+
+import array_physics
+from config import Config
+from particle_ import FIELDS, Particle, ParticleStore
+from physics import particle_rows
+
+
+(
+    N,
+    SIM_W,
+    BOTTOM,
+    DAM,
+    DAM_BREAK,
+    G,
+    SPACING,
+    K,
+    K_NEAR,
+    REST_DENSITY,
+    R,
+    SIGMA,
+    MAX_VEL,
+    WALL_DAMP,
+    VEL_DAMP,
+    GRID_CELL_SIZE
+) = Config().return_config()
+
+# 커널 반경 R 은 모든 입자에 같으므로, 무거운 입자끼리의 간격이 R 을 넘지 않도록
+# 병합은 질량 2 까지만 허용하는 것을 기본으로 합니다.
+MAX_MASS = 2.0
+# 병합 조건: 속도가 MERGE_SPEED 미만이고 밀도가 REST_DENSITY 의 MERGE_DENSITY_RATIO 배 이상
+MERGE_SPEED = 0.01
+MERGE_DENSITY_RATIO = 0.9
+# 분할 조건: 속도가 SPLIT_SPEED 초과이거나 밀도가 REST_DENSITY 의 SPLIT_DENSITY_RATIO 배 미만
+SPLIT_SPEED = 0.05
+SPLIT_DENSITY_RATIO = 0.5
+# 분할된 두 입자 사이 간격의 절반
+SPLIT_OFFSET = SPACING * 0.25
+
+
+def adapt_resolution(
+    particles: list[Particle],
+    max_mass: float = MAX_MASS,
+    merge_speed: float = MERGE_SPEED,
+    merge_density: float = None,
+    split_speed: float = SPLIT_SPEED,
+    split_density: float = None,
+) -> list[Particle]:
+    """
+    입자를 활동도에 따라 병합/분할한 새 입자 리스트 (새 ParticleStore) 를 반환합니다.
+    update() 사이에 호출하며, 반환된 리스트로 시뮬레이션을 이어갑니다. 판단에 쓰는
+    밀도는 임시 저장소에서 계산하므로 넘겨받은 입자 (밀도, 이웃 목록) 는 바뀌지 않습니다.
+
+    Args:
+        particles (list[Particle]): 한 ParticleStore 에 있는 입자 리스트
+        max_mass (float): 병합으로 만들 수 있는 최대 질량
+        merge_speed (float): 이 속도 미만인 입자만 병합
+        merge_density (float): 밀도가 이 값 이상인 (내부) 입자만 병합.
+            None 이면 현재 REST_DENSITY (set_parameters 로 바꾼 값) 의 MERGE_DENSITY_RATIO 배
+        split_speed (float): 이 속도를 넘는 무거운 입자는 분할
+        split_density (float): 밀도가 이 값 미만인 (자유 표면) 무거운 입자는 분할.
+            None 이면 현재 REST_DENSITY 의 SPLIT_DENSITY_RATIO 배
+
+    Returns:
+        list[Particle]: 새 입자 리스트
+    """
+    if merge_density is None:
+        merge_density = MERGE_DENSITY_RATIO * REST_DENSITY
+    if split_density is None:
+        split_density = SPLIT_DENSITY_RATIO * REST_DENSITY
+    if merge_speed > split_speed or merge_density < split_density:
+        raise ValueError("Merge thresholds must lie inside the split thresholds")
+    store, rows = particle_rows(particles)
+    if store is None:
+        return []
+
+    # 리스트 순서로 복사한 값. 아래의 행 번호 i 는 리스트에서의 위치입니다
+    columns = {field: [getattr(store, field)[i] for i in rows] for field in FIELDS}
+    count = len(rows)
+
+    # 현재 위치에서의 밀도와 이웃 목록. 호출자의 저장소 (rho, rho_near, 이웃 목록) 는
+    # 건드리지 않도록 위치와 질량만 옮긴 임시 저장소에서 계산함
+    scratch = ParticleStore()
+    for _ in range(count):
+        scratch.add(0.0, 0.0)
+    for field in ("x_pos", "y_pos", "mass", "self_kernel"):
+        setattr(scratch, field, array("d", columns[field]))
+    grid = array_physics.create_row_grid(scratch, R)
+    array_physics.calculate_density(scratch, grid, R)
+    columns["rho"] = scratch.rho.tolist()
+    columns["rho_near"] = scratch.rho_near.tolist()
+
+    mass, rho = columns["mass"], columns["rho"]
+    speed = [hypot(x_vel, y_vel) for x_vel, y_vel in zip(columns["x_vel"], columns["y_vel"])]
+    calm = [speed[i] < merge_speed and rho[i] >= merge_density for i in range(count)]
+
+    # 병합 상대: 아직 짝이 없는 가장 가까운 calm 이웃과 그 거리
+    partner = {}
+    used = [False] * count
+    for i in range(count):
+        if used[i] or not calm[i]:
+            continue
+        best, best_distance = None, R
+        for pair in range(scratch.pair_start[i], scratch.pair_start[i + 1]):
+            j = scratch.pair_rows[pair]
+            distance = scratch.pair_kernels[pair][2]
+            if (
+                not used[j]
+                and calm[j]
+                and mass[i] + mass[j] <= max_mass
+                and distance < best_distance
+            ):
+                best, best_distance = j, distance
+        if best is not None:
+            used[i] = used[best] = True
+            partner[i] = best, best_distance
+
+    result = {field: [] for field in FIELDS}
+    for i in range(count):
+        if i in partner:
+            j, distance = partner[i]
+            total = mass[i] + mass[j]
+            for field in FIELDS:
+                column = columns[field]
+                result[field].append((column[i] * mass[i] + column[j] * mass[j]) / total)
+            result["mass"][-1] = total
+            result["self_kernel"][-1] = _merged_self_kernel(columns, i, j, distance)
+        elif used[i]:
+            # 앞선 입자에 병합됨
+            continue
+        elif mass[i] > 1.0 and (speed[i] > split_speed or rho[i] < split_density):
+            _split(columns, i, speed[i], result)
+        else:
+            for field in FIELDS:
+                result[field].append(columns[field][i])
+
+    new_store = ParticleStore()
+    new_particles = [new_store.add(0.0, 0.0) for _ in range(len(result["mass"]))]
+    for field in FIELDS:
+        setattr(new_store, field, array("d", result[field]))
+    return new_particles
+
+
+def _merged_self_kernel(columns: dict, i: int, j: int, distance: float) -> float:
+    """
+    i, j 행을 합친 입자의 self_kernel. 합친 입자의 자기 밀도 (M - 1) * w^2 가 두 입자
+    밀도의 질량 가중 평균에서 바깥 이웃의 기여를 뺀 값, 즉 각자의 자기 항과 서로의
+    기여 m_j * w_ij^2 (i 쪽), m_i * w_ij^2 (j 쪽) 의 평균이 되도록 정합니다.
+    """
+    mass, self_kernel = columns["mass"], columns["self_kernel"]
+    m_i, m_j = mass[i], mass[j]
+    total = m_i + m_j
+    if total <= 1.0:
+        # 질량 1 이하의 입자는 자기 항이 없음
+        return 0.0
+    w_ij = 1 - distance / R
+    inner = (
+        m_i * (m_i - 1.0) * self_kernel[i] ** 2
+        + m_j * (m_j - 1.0) * self_kernel[j] ** 2
+        + 2 * m_i * m_j * w_ij * w_ij
+    ) / total
+    return sqrt(inner / (total - 1.0))
+
+
+def _split(columns: dict, i: int, speed: float, result: dict) -> None:
+    """i 행 입자를 속도에 수직인 방향으로 나란히 놓인 두 절반으로 나눠 result 에 추가합니다."""
+    if speed > 0.0:
+        normal_x = -columns["y_vel"][i] / speed
+        normal_y = columns["x_vel"][i] / speed
+    else:
+        normal_x, normal_y = 1.0, 0.0
+    offsets = {
+        "x_pos": normal_x * SPLIT_OFFSET,
+        "previous_x_pos": normal_x * SPLIT_OFFSET,
+        "visual_x_pos": normal_x * SPLIT_OFFSET,
+        "y_pos": normal_y * SPLIT_OFFSET,
+        "previous_y_pos": normal_y * SPLIT_OFFSET,
+        "visual_y_pos": normal_y * SPLIT_OFFSET,
+    }
+    for sign in (-1.0, 1.0):
+        for field in FIELDS:
+            result[field].append(columns[field][i] + sign * offsets.get(field, 0.0))
+        result["mass"][-1] = columns["mass"][i] / 2
@@ -0,0 +1,272 @@
+from array import array
+
+from config import Config
+from kernel import R_SQ, kernel_terms
+from particle_ import ParticleStore
+
+
+(
+    N,
+    SIM_W,
+    BOTTOM,
+    DAM,
+    DAM_BREAK,
+    G,
+    SPACING,
+    K,
+    K_NEAR,
+    REST_DENSITY,
+    R,
+    SIGMA,
+    MAX_VEL,
+    WALL_DAMP,
+    VEL_DAMP,
+    GRID_CELL_SIZE
+) = Config().return_config()
+
+# Jacobi 점성에서 암시적 식을 푸는 반복 횟수. 이웃이 30 개 이상인 촘촘한 장면에서도
+# Gauss-Seidel 한 번과 비슷하게 감쇠하도록 정함 (test_physics 의 감쇠 비교 참고)
+JACOBI_SWEEPS = 4
+# 반복마다 새 값으로 절반만 옮겨 감 (가중 Jacobi). 촘촘한 곳에서 반복이 진동하며
+# 접근 속도를 키우지 않게 합니다.
+JACOBI_WEIGHT = 0.5
+
+# physics.py 의 Particle 객체용 함수 (기준 구현) 의 배열 버전. ParticleStore 의 배열
+# 위에서 행 번호로 계산하며, rows 는 계산할 행을 순회 순서대로 나열합니다 (None 이면
+# 저장소의 모든 행). 기준 구현과 같은 순서로 계산하므로 결과가 비트 단위로 같습니다.
+# physics.update() 는 모든 입자가 한 저장소에 있으면 이 함수들을 씁니다.
+# 이웃 목록은 store.pair_start / pair_rows / pair_kernels 에 CSR 형식으로 두며,
+# rows 의 k 번째 행의 이웃은 pair_rows[pair_start[k]:pair_start[k + 1]] 입니다.
+
+
+def create_row_grid(store: ParticleStore, grid_cell_size: float, rows=None) -> dict:
+    """physics.create_grid 와 같지만 셀에 행 번호를 담습니다."""
+    grid = {}
+    x_pos, y_pos = store.x_pos, store.y_pos
+    for i in range(len(store)) if rows is None else rows:
+        cell_coords = (
+            int((x_pos[i] + SIM_W) / grid_cell_size),
+            int((y_pos[i] + SIM_W) / grid_cell_size),
+        )
+        if cell_coords not in grid:
+            grid[cell_coords] = []
+        grid[cell_coords].append(i)
+    return grid
+
+
+def calculate_density(
+    store: ParticleStore, grid: dict, grid_cell_size: float, rows=None
+) -> None:
+    """
+    rows 의 밀도와 근접 밀도를 계산하고 이웃 목록 (CSR) 을 기록합니다.
+    이웃의 커널 값은 그 이웃의 질량만큼 더해집니다. 병합된 입자 (질량 > 1) 는 안에
+    합쳐진 쌍이 서로에게 주던 기여를 self_kernel 로 더해, 나뉘어 있을 때와 같은
+    밀도를 갖습니다.
+    """
+    # 읽기 전용 값은 리스트로 복사해 두면 인덱싱할 때마다 float 객체를 만들지 않음
+    x_pos, y_pos = store.x_pos.tolist(), store.y_pos.tolist()
+    mass = store.mass.tolist()
+    self_kernel = store.self_kernel.tolist()
+    rho, rho_near = store.rho, store.rho_near
+    store.clear_pairs()
+    pair_start = store.pair_start
+    pair_rows = store.pair_rows
+    pair_kernels = store.pair_kernels
+    for i in range(len(store)) if rows is None else rows:
+        pair_start.append(len(pair_rows))
+        x, y = x_pos[i], y_pos[i]
+        # 자기 항: 질량 1 이면 정확히 0.0
+        inner = mass[i] - 1.0
+        w1 = self_kernel[i]
+        density = inner * w1 * w1
+        density_near = density * w1
+
+        cell_x = int((x + SIM_W) / grid_cell_size)
+        cell_y = int((y + SIM_W) / grid_cell_size)
+
+        for cx in range(cell_x - 1, cell_x + 2):
+            for cy in range(cell_y - 1, cell_y + 2):
+                if (cx, cy) in grid:
+                    for j in grid[(cx, cy)]:
+                        if i != j:
+                            dx = x_pos[j] - x
+                            dy = y_pos[j] - y
+                            distance_sq = dx * dx + dy * dy
+                            # sqrt 전에 제곱 거리로 거름
+                            if distance_sq < R_SQ:
+                                kernel = kernel_terms(dx, dy, distance_sq)
+                                density += mass[j] * kernel[4]
+                                density_near += mass[j] * kernel[5]
+                                pair_rows.append(j)
+                                pair_kernels.append(kernel)
+        rho[i] = density
+        rho_near[i] = density_near
+    pair_start.append(len(pair_rows))
+
+
+def create_pressure(store: ParticleStore, rows=None) -> None:
+    """
+    이웃 목록 (CSR) 의 쌍마다 압력 힘을 계산해 두 입자에 반대 방향으로 더합니다.
+    쌍의 힘은 두 입자 질량의 곱에 비례하고 x_force / y_force 는 가속도이므로,
+    각 입자는 상대 입자의 질량만큼 가속되며 운동량이 보존됩니다.
+    """
+    press, press_near = store.press.tolist(), store.press_near.tolist()
+    x_force, y_force = store.x_force.tolist(), store.y_force.tolist()
+    mass = store.mass.tolist()
+    pair_start, pair_rows, pair_kernels = store.pair_start, store.pair_rows, store.pair_kernels
+    for k, i in enumerate(range(len(store)) if rows is None else rows):
+        press_x = 0.0
+        press_y = 0.0
+        press_i = press[i]
+        press_near_i = press_near[i]
+        for pair in range(pair_start[k], pair_start[k + 1]):
+            j = pair_rows[pair]
+            dx, dy, distance, _, w2, w3 = pair_kernels[pair]
+            total_pressure = (press_i + press[j]) * w2 + (press_near_i + press_near[j]) * w3
+            pressure_x = dx * total_pressure / distance
+            pressure_y = dy * total_pressure / distance
+            x_force[j] += pressure_x * mass[i]
+            y_force[j] += pressure_y * mass[i]
+            press_x += pressure_x * mass[j]
+            press_y += pressure_y * mass[j]
+        x_force[i] -= press_x
+        y_force[i] -= press_y
+    store.x_force[:] = array("d", x_force)
+    store.y_force[:] = array("d", y_force)
+
+
+def calculate_viscosity(store: ParticleStore, mode: str = "gauss_seidel", rows=None) -> None:
+    """
+    이웃 목록 (CSR) 의 쌍마다 점성 충격량을 두 입자의 속도에 반대 방향으로 적용합니다.
+    쌍이 주고받는 운동량은 두 질량의 곱에 비례하고 각 입자의 속도는 상대 입자의
+    질량만큼 바뀌므로 운동량이 보존됩니다 (같은 질량 1 이면 절반씩). 병합된 입자의
+    쌍은 나뉘어 있을 때의 m_i * m_j 개 쌍이 주던 충격량을 함께 전달하되, 접근 속도는
+    질량 1 인 쌍 하나보다 (또는 멈추는 것보다) 더 줄이지 않습니다. Gauss-Seidel 에서는
+    나뉜 쌍 중 첫 쌍이 이미 접근을 멈추게 해 나머지 쌍은 충격량을 주지 않기 때문입니다.
+    mode 는 physics.calculate_viscosity 를 참고하세요.
+    """
+    if mode == "jacobi":
+        _calculate_viscosity_jacobi(store, rows)
+        return
+    if mode != "gauss_seidel":
+        raise ValueError(f"Unknown viscosity mode: {mode}")
+    x_vel, y_vel = store.x_vel.tolist(), store.y_vel.tolist()
+    mass = store.mass.tolist()
+    pair_start, pair_rows, pair_kernels = store.pair_start, store.pair_rows, store.pair_kernels
+    for k, i in enumerate(range(len(store)) if rows is None else rows):
+        for pair in range(pair_start[k], pair_start[k + 1]):
+            j = pair_rows[pair]
+            dx, dy, distance, w1, _, _ = pair_kernels[pair]
+            normal_x = dx / distance
+            normal_y = dy / distance
+            velocity_difference = (x_vel[i] - x_vel[j]) * normal_x + (
+                y_vel[i] - y_vel[j]
+            ) * normal_y
+            if velocity_difference > 0:
+                impulse = w1 * SIGMA * velocity_difference * 0.5
+                m_i, m_j = mass[i], mass[j]
+                if m_i != 1.0 or m_j != 1.0:
+                    # 상대 속도는 impulse * (m_i + m_j) 만큼 줄어듦
+                    weight = w1 * SIGMA
+                    reduction = min(weight * (m_i + m_j) * 0.5, max(weight, 1.0))
+                    impulse = reduction * velocity_difference / (m_i + m_j)
+                impulse_i = impulse * m_j
+                impulse_j = impulse * m_i
+                x_vel[i] -= impulse_i * normal_x
+                y_vel[i] -= impulse_i * normal_y
+                x_vel[j] += impulse_j * normal_x
+                y_vel[j] += impulse_j * normal_y
+    store.x_vel[:] = array("d", x_vel)
+    store.y_vel[:] = array("d", y_vel)
+
+
+def _calculate_viscosity_jacobi(store: ParticleStore, rows=None) -> None:
+    """
+    Jacobi 방식의 점성 계산. 접근 중인 쌍 (속도 스냅샷에서 velocity_difference > 0)
+    마다 Gauss-Seidel 과 같은 감쇠 계수를 쓰되, 충격량을 갱신 전 속도가 아니라 점성을
+    적용한 뒤의 속도로 계산하는 암시적 식을 풉니다. 이 선형 식을 JACOBI_SWEEPS 번의
+    가중 Jacobi 반복 (입자마다 2x2 블록) 으로 근사한 뒤, 그 속도로 계산한 쌍 충격량을
+    scatter-add 로 적용합니다.
+
+    모든 반복은 이전 반복의 값만 읽으므로 결과는 입자 순서와 무관하고, 한 입자가
+    수십 개의 쌍에서 충격량을 한꺼번에 받아도 상대 속도를 뒤집지 않습니다. 쌍 충격량은
+    두 입자에 반대 방향으로 같은 운동량을 주므로 운동량이 보존됩니다.
+    """
+    if rows is None:
+        rows = range(len(store))
+    count = len(store)
+    x_vel = store.x_vel.tolist()
+    y_vel = store.y_vel.tolist()
+    mass = store.mass.tolist()
+    pair_start, pair_rows, pair_kernels = store.pair_start, store.pair_rows, store.pair_kernels
+
+    # 접근 중인 쌍: (i, j, normal_x, normal_y, 상대 속도 감소 계수 / (m_i + m_j))
+    active = []
+    for k, i in enumerate(rows):
+        for pair in range(pair_start[k], pair_start[k + 1]):
+            j = pair_rows[pair]
+            dx, dy, distance, w1, _, _ = pair_kernels[pair]
+            normal_x = dx / distance
+            normal_y = dy / distance
+            velocity_difference = (x_vel[i] - x_vel[j]) * normal_x + (
+                y_vel[i] - y_vel[j]
+            ) * normal_y
+            if velocity_difference > 0:
+                # calculate_viscosity 의 Gauss-Seidel 과 같은 감소 계수
+                m_i, m_j = mass[i], mass[j]
+                reduction = w1 * SIGMA
+                if m_i != 1.0 or m_j != 1.0:
+                    reduction = min(reduction * (m_i + m_j) * 0.5, max(reduction, 1.0))
+                active.append((i, j, normal_x, normal_y, reduction / (m_i + m_j)))
+    if not active:
+        return
+
+    # 암시적 식 v'_i = v_i - sum(c_ij * m_j * n n^T (v'_i - v'_j)) 의 2x2 대각 블록
+    diagonal_xx = [1.0] * count
+    diagonal_xy = [0.0] * count
+    diagonal_yy = [1.0] * count
+    for i, j, normal_x, normal_y, coefficient in active:
+        for row, weight in ((i, coefficient * mass[j]), (j, coefficient * mass[i])):
+            diagonal_xx[row] += weight * normal_x * normal_x
+            diagonal_xy[row] += weight * normal_x * normal_y
+            diagonal_yy[row] += weight * normal_y * normal_y
+
+    solved_x, solved_y = x_vel, y_vel
+    for _ in range(JACOBI_SWEEPS):
+        right_x = x_vel[:]
+        right_y = y_vel[:]
+        for i, j, normal_x, normal_y, coefficient in active:
+            along_j = (solved_x[j] * normal_x + solved_y[j] * normal_y) * coefficient * mass[j]
+            along_i = (solved_x[i] * normal_x + solved_y[i] * normal_y) * coefficient * mass[i]
+            right_x[i] += along_j * normal_x
+            right_y[i] += along_j * normal_y
+            right_x[j] += along_i * normal_x
+            right_y[j] += along_i * normal_y
+        previous_x, previous_y = solved_x, solved_y
+        solved_x = [0.0] * count
+        solved_y = [0.0] * count
+        for row in range(count):
+            xx, xy, yy = diagonal_xx[row], diagonal_xy[row], diagonal_yy[row]
+            determinant = xx * yy - xy * xy
+            jacobi_x = (yy * right_x[row] - xy * right_y[row]) / determinant
+            jacobi_y = (xx * right_y[row] - xy * right_x[row]) / determinant
+            solved_x[row] = previous_x[row] + JACOBI_WEIGHT * (jacobi_x - previous_x[row])
+            solved_y[row] = previous_y[row] + JACOBI_WEIGHT * (jacobi_y - previous_y[row])
+
+    # 풀어 낸 속도의 접근 속도로 쌍 충격량을 계산해 scatter-add
+    delta_x = [0.0] * count
+    delta_y = [0.0] * count
+    for i, j, normal_x, normal_y, coefficient in active:
+        velocity_difference = (solved_x[i] - solved_x[j]) * normal_x + (
+            solved_y[i] - solved_y[j]
+        ) * normal_y
+        if velocity_difference > 0:
+            impulse = coefficient * velocity_difference
+            impulse_i = impulse * mass[j]
+            impulse_j = impulse * mass[i]
+            delta_x[i] -= impulse_i * normal_x
+            delta_y[i] -= impulse_i * normal_y
+            delta_x[j] += impulse_j * normal_x
+            delta_y[j] += impulse_j * normal_y
+    store.x_vel[:] = array("d", [x + dx for x, dx in zip(x_vel, delta_x)])
+    store.y_vel[:] = array("d", [y + dy for y, dy in zip(y_vel, delta_y)])
@@ -0,0 +1,251 @@
+"""
+Machine-specific auto-tuner for the simulation step.
+
+Benchmarks short runs of the main.py scene across grid cell size, grid reuse
+skin, particle reorder interval and backend (the array code in array_physics.py
+or the per-object code in physics.py), keeps the fastest configuration that
+computes the same neighbours as the default settings, and caches it per machine
+and scene signature.
+
+Each candidate is timed several times and its best run is kept, and a candidate
+only replaces the current best when it is faster by more than MIN_GAIN, so
+timer noise does not decide between settings that perform the same.
+
+None of the candidates change the scheme, only how neighbours are found and in
+which order they are visited. Because the Gauss-Seidel viscosity sweep depends
+on that order, trajectories drift apart within a few dozen steps of a splashing
+scene even when every step is right, so the result is checked per step instead:
+after every step the densities a candidate used must match a fresh exact
+neighbour search at the same positions.
+
+Two things are deliberately not tuned. Jacobi viscosity is a different scheme
+rather than a faster backend. The chunk size and thread count of the old
+threaded Jacobi pass are gone along with the thread pool (threads cannot run
+the pure Python loops in parallel), so there is no chunk size left to tune.
+
+    python autotune.py [--steps 30] [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import time
+from math import isfinite
+
+import array_physics
+from config import Config
+from particle_ import Particle, ParticleStore
+from physics import start, update
+
+
+(
+    N,
+    SIM_W,
+    BOTTOM,
+    DAM,
+    DAM_BREAK,
+    G,
+    SPACING,
+    K,
+    K_NEAR,
+    REST_DENSITY,
+    R,
+    SIGMA,
+    MAX_VEL,
+    WALL_DAMP,
+    VEL_DAMP,
+    GRID_CELL_SIZE
+) = Config().return_config()
+
+CACHE_PATH = os.path.join(
+    os.environ.get("SPH_FLUID_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "sph_fluid")),
+    "autotune.json",
+)
+# 다시 계산한 밀도와의 허용 상대 오차. 이웃이 하나만 빠지거나 더해져도 이보다 훨씬
+# 크게 달라지고, 합산 순서에 따른 반올림 차이는 이보다 훨씬 작습니다.
+TOLERANCE = 1e-9
+# 후보마다 시간을 재는 횟수 (가장 빠른 실행을 사용) 와, 현재 최적 설정을 바꾸는 데
+# 필요한 최소 속도 향상 비율
+REPEATS = 3
+MIN_GAIN = 0.05
+
+DEFAULT_SETTINGS = {
+    "grid_cell_size": GRID_CELL_SIZE,
+    "skin": 0.0,
+    "reorder_every": 0,
+    "backend": "array",
+}
+
+
+def scene(count: int = N) -> list[Particle]:
+    """main.py 와 같은 초기 입자 배치를 만듭니다."""
+    return start(-SIM_W, SIM_W, BOTTOM + 1, 0.03, count)
+
+
+def machine_signature() -> str:
+    """튜닝 결과를 재사용할 수 있는 기계를 구분하는 문자열."""
+    return "-".join(
+        str(part)
+        for part in (
+            platform.machine(),
+            platform.processor() or "unknown",
+            os.cpu_count(),
+            platform.python_implementation(),
+            platform.python_version(),
+        )
+    )
+
+
+def scene_signature(count: int = N) -> str:
+    """설정 값과 입자 수가 같으면 같은 장면으로 봅니다."""
+    config = repr((Config().return_config(), count))
+    return hashlib.sha1(config.encode()).hexdigest()[:16]
+
+
+def candidates() -> dict:
+    """각 설정 항목의 후보 값."""
+    return {
+        "grid_cell_size": [R, R * 1.25, R * 1.5, R * 2.0],
+        "skin": [0.0, SPACING * 0.125, SPACING * 0.25, SPACING * 0.5],
+        "reorder_every": [0, 10, 50],
+        "backend": ["array", "objects"],
+    }
+
+
+def measure(
+    settings: dict, steps: int, count: int = N, repeats: int = REPEATS
+) -> tuple[float, float]:
+    """
+    설정으로 장면을 steps 단계씩 repeats 번 실행하고 매 단계 step_error 로 확인합니다.
+
+    Returns:
+        tuple: (가장 빠른 실행에서 update 에 걸린 시간 초, 단계별 step_error 의 최댓값)
+    """
+    best_seconds = float("inf")
+    error = 0.0
+    for _ in range(repeats):
+        particles = scene(count)
+        cache = {}
+        seconds = 0.0
+        for _ in range(steps):
+            begin = time.perf_counter()
+            particles = update(particles, False, cache=cache, **settings)
+            seconds += time.perf_counter() - begin
+            error = max(error, step_error(particles))
+        best_seconds = min(best_seconds, seconds)
+    return best_seconds, error
+
+
+def step_error(particles: list[Particle]) -> float:
+    """
+    방금 끝난 update 가 쓴 밀도 (rho, rho_near) 와, 그 단계의 위치 (previous_x_pos,
+    previous_y_pos) 에서 셀 크기 R 의 새 격자로 다시 계산한 밀도의 최대 상대 차이.
+    밀도는 이웃 집합에 대한 합이고 압력 힘은 밀도와 이웃 집합으로 정해지므로, 이 값이
+    반올림 수준이면 그 단계의 이웃과 압력 힘이 기본 설정과 같습니다.
+    값이 유한하지 않으면 inf.
+    """
+    store = ParticleStore()
+    for particle in particles:
+        store.add(particle.previous_x_pos, particle.previous_y_pos).mass = particle.mass
+    array_physics.calculate_density(store, array_physics.create_row_grid(store, R), R)
+    error = 0.0
+    for particle, rho, rho_near in zip(particles, store.rho, store.rho_near):
+        if not (isfinite(particle.rho) and isfinite(particle.rho_near)):
+            return float("inf")
+        error = max(
+            error,
+            abs(particle.rho - rho) / max(rho, 1.0),
+            abs(particle.rho_near - rho_near) / max(rho_near, 1.0),
+        )
+    return error
+
+
+def autotune(steps: int = 30, count: int = N, verbose: bool = True) -> dict:
+    """
+    항목별로 후보를 바꿔 가며 (좌표 하강) 매 단계 기본 설정과 같은 이웃을 쓰는 가장
+    빠른 설정을 찾아 캐시에 저장합니다. 후보는 현재 최적보다 MIN_GAIN 이상 빨라야
+    채택됩니다.
+
+    Returns:
+        dict: update 에 키워드 인자로 넘길 수 있는 설정
+    """
+    reference_seconds, _ = measure(DEFAULT_SETTINGS, steps, count)
+    if verbose:
+        print(f"default: {reference_seconds:.3f}s")
+    best = dict(DEFAULT_SETTINGS)
+    best_seconds = reference_seconds
+
+    def consider(settings: dict) -> None:
+        nonlocal best, best_seconds
+        # 3x3 셀 탐색이 이웃을 놓치지 않도록 셀 크기를 보정
+        settings["grid_cell_size"] = max(settings["grid_cell_size"], R + settings["skin"] / 2)
+        if settings == best:
+            return
+        seconds, error = measure(settings, steps, count)
+        accepted = error <= TOLERANCE and seconds < best_seconds * (1 - MIN_GAIN)
+        if verbose:
+            print(f"{settings}: {seconds:.3f}s, error {error:.4g}{' *' if accepted else ''}")
+        if accepted:
+            best, best_seconds = settings, seconds
+
+    for name, values in candidates().items():
+        for value in values:
+            settings = dict(best)
+            settings[name] = value
+            consider(settings)
+
+    if verbose:
+        print(f"best: {best} ({reference_seconds / best_seconds:.2f}x faster than default)")
+    save_tuned(best, count)
+    return best
+
+
+def _load_cache() -> dict:
+    try:
+        with open(CACHE_PATH, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_tuned(settings: dict, count: int = N) -> None:
+    """튜닝 결과를 기계/장면 서명을 키로 캐시 파일에 기록합니다."""
+    cache = _load_cache()
+    cache[f"{machine_signature()}/{scene_signature(count)}"] = settings
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    with open(CACHE_PATH, "w", encoding="utf-8") as file:
+        json.dump(cache, file, indent=2, sort_keys=True)
+
+
+def load_tuned(count: int = N):
+    """
+    이 기계와 장면에 대해 캐시된 설정을 반환합니다.
+
+    Returns:
+        dict | None: update 키워드 인자, 캐시가 없으면 None
+    """
+    settings = _load_cache().get(f"{machine_signature()}/{scene_signature(count)}")
+    if settings is None:
+        return None
+    # 예전 버전이 저장한, 더 이상 튜닝하지 않는 항목 (점성 방식 등) 은 버림
+    return {name: settings[name] for name in DEFAULT_SETTINGS if name in settings}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tune simulation settings for this machine.")
+    parser.add_argument("--steps", type=int, default=30, help="steps per benchmark run")
+    parser.add_argument("--count", type=int, default=N, help="number of particles")
+    parser.add_argument("--force", action="store_true", help="re-tune even if cached")
+    args = parser.parse_args()
+
+    cached = None if args.force else load_tuned(args.count)
+    if cached is not None:
+        print(f"cached: {cached}")
+        return
+    autotune(args.steps, args.count)
+
+
+if __name__ == "__main__":
+    main()
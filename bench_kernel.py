@@ -0,0 +1,96 @@
+"""
+Per-pair microbenchmark for the SPH kernel.
+
+Compares the previous per-phase arithmetic (sqrt on every candidate pair, then
+normal_distance**2 / **3 recomputed in density, pressure and viscosity) with the
+shared kernel module (squared-distance rejection, one fused kernel_terms call
+per neighbour pair reused by every force phase).
+
+    python bench_kernel.py
+"""
+
+import timeit
+from math import sqrt
+
+from config import Config
+from kernel import R_SQ, kernel_terms
+from physics import start
+
+
+(
+    N,
+    SIM_W,
+    BOTTOM,
+    DAM,
+    DAM_BREAK,
+    G,
+    SPACING,
+    K,
+    K_NEAR,
+    REST_DENSITY,
+    R,
+    SIGMA,
+    MAX_VEL,
+    WALL_DAMP,
+    VEL_DAMP,
+    GRID_CELL_SIZE
+) = Config().return_config()
+
+
+def candidate_pairs(count: int = 400) -> list[tuple[float, float]]:
+    """Pair offsets as calculate_density sees them: every particle within the 3x3 cell block."""
+    particles = start(-1.0, 1.0, 0.0, SPACING * 0.5, count)
+    pairs = []
+    for particle in particles:
+        for neighbor in particles:
+            if particle is not neighbor:
+                dx = neighbor.x_pos - particle.x_pos
+                dy = neighbor.y_pos - particle.y_pos
+                if abs(dx) < 1.5 * GRID_CELL_SIZE and abs(dy) < 1.5 * GRID_CELL_SIZE:
+                    pairs.append((dx, dy))
+    return pairs
+
+
+def before(pairs: list[tuple[float, float]]) -> float:
+    total = 0.0
+    # density: sqrt for every candidate
+    for dx, dy in pairs:
+        distance = sqrt(dx**2 + dy**2)
+        if distance < R:
+            normal_distance = 1 - distance / R
+            total += normal_distance**2 + normal_distance**3
+            # pressure: distance and powers recomputed
+            distance = sqrt(dx**2 + dy**2)
+            normal_distance = 1 - distance / R
+            total += normal_distance**2 + normal_distance**3
+            # viscosity: distance recomputed once more
+            distance = sqrt(dx**2 + dy**2)
+            total += 1 - distance / R
+    return total
+
+
+def after(pairs: list[tuple[float, float]]) -> float:
+    total = 0.0
+    for dx, dy in pairs:
+        distance_sq = dx * dx + dy * dy
+        if distance_sq < R_SQ:
+            kernel = kernel_terms(dx, dy, distance_sq)
+            total += kernel[4] + kernel[5]
+            # pressure and viscosity read the cached tuple
+            _, _, distance, w1, w2, w3 = kernel
+            total += w2 + w3
+            total += w1
+    return total
+
+
+def main() -> None:
+    pairs = candidate_pairs()
+    neighbors = sum(1 for dx, dy in pairs if dx * dx + dy * dy < R_SQ)
+    print(f"{len(pairs)} candidate pairs, {neighbors} within R")
+    for name, function in (("before", before), ("after", after)):
+        seconds = min(timeit.repeat(lambda: function(pairs), number=5, repeat=5)) / 5
+        print(f"{name:>6}: {seconds * 1e9 / len(pairs):7.1f} ns per candidate pair")
+
+
+if __name__ == "__main__":
+    main()
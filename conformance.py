@@ -0,0 +1,380 @@
+"""
+Cross-backend conformance and performance comparison.
+
+Runs the same scenes through every registered backend for a number of steps
+and compares the final per-field state with its baseline, normally the
+reference backend: standalone Particle objects stepped by the per-object
+functions in physics.py and particle_.py, which share no code with the
+column loops in array_physics.py.
+For each field it reports the maximum and RMS error, and for each run the
+energy drift, the final momentum relative to the baseline and the speedup over
+the reference, in one table.
+
+Every backend must stay stable: finite values, particles inside the walls and
+above the floor (within a margin) and a bounded kinetic energy. On top of that
+a backend is gated in one of two ways, neither of which depends on the number
+of steps:
+
+- with a tolerance, its final state must match the baseline's to within it.
+  The array backends compute the same sums in the same order as the
+  per-object reference and use 0.0, so any change to either implementation
+  that alters the arithmetic shows up here.
+- with same_neighbours, every step must use the same neighbours and densities
+  (hence the same pressure forces) as the default settings, checked as in
+  autotune.step_error. This is for backends that change the Gauss-Seidel sweep
+  order (reordering, skin grids). The sweep order is part of the scheme, so
+  their states legitimately drift away from the reference over a long run.
+
+A backend is a function that builds its own particles from the scene's
+starting positions and returns them with a step function. register_backend()
+adds engines that are only available on some machines (e.g. behind an optional
+import); everything here runs in pure Python on CPU-only Linux.
+
+    python conformance.py [--steps 10] [--count 300]
+"""
+
+import argparse
+import time
+from math import isfinite, sqrt
+
+from autotune import TOLERANCE, step_error
+from config import Config
+from particle_ import Particle, ParticleStore
+from physics import get_parameters, shared_store, start, update
+
+
+(
+    N,
+    SIM_W,
+    BOTTOM,
+    DAM,
+    DAM_BREAK,
+    G,
+    SPACING,
+    K,
+    K_NEAR,
+    REST_DENSITY,
+    R,
+    SIGMA,
+    MAX_VEL,
+    WALL_DAMP,
+    VEL_DAMP,
+    GRID_CELL_SIZE
+) = Config().return_config()
+
+FIELDS = ("x_pos", "y_pos", "x_vel", "y_vel")
+# 안정성 검사: 벽 밖과 바닥 아래로 DOMAIN_MARGIN 넘게 나갈 수 있는 입자의 비율과
+# 허용하는 최대 RMS 속도. 벽과 바닥은 약한 용수철이라 안정된 실행에서도 입자가 조금
+# 들어가고, 긴 실행에서는 물보라 몇 개가 벽을 넘습니다.
+DOMAIN_MARGIN = SIM_W * 0.5
+MAX_OUTSIDE_FRACTION = 0.1
+MAX_RMS_SPEED = MAX_VEL * 0.5
+
+
+def scenes(count: int = 300) -> dict:
+    """
+    비교에 쓰는 장면들. 값은 (x, y) 시작 위치 리스트를 만드는 함수입니다.
+    """
+
+    def positions(xmin: float, xmax: float, ymin: float, space: float) -> list:
+        return [(p.x_pos, p.y_pos) for p in start(xmin, xmax, ymin, space, count)]
+
+    return {
+        # main.py 의 초기 배치 (촘촘한 블록이 떨어지며 퍼짐)
+        "dam": lambda: positions(-SIM_W, SIM_W, BOTTOM + 1, 0.03),
+        # 조금 성긴 블록이 바닥으로 떨어짐
+        "block": lambda: positions(-1.5, 1.5, BOTTOM + 0.5, 0.07),
+    }
+
+
+def _standalone(settings: dict):
+    """
+    입자마다 따로 만든 Particle 객체 위에서 physics.py 의 객체별 함수로 계산하는 기준
+    백엔드. array_physics.py 는 전혀 쓰지 않으므로 배열 경로와 독립된 구현입니다.
+    """
+
+    def build(positions: list) -> tuple:
+        particles = [Particle(x, y) for x, y in positions]
+        cache = {}
+        return particles, lambda: update(particles, False, backend="objects", cache=cache, **settings)
+
+    return build
+
+
+def _stored(settings: dict):
+    """한 ParticleStore 를 공유하고 저장소 열 위에서 array_physics.py 로 계산하는 백엔드."""
+
+    def build(positions: list) -> tuple:
+        store = ParticleStore()
+        particles = [store.add(x, y) for x, y in positions]
+        cache = {}
+        return particles, lambda: update(particles, False, backend="array", cache=cache, **settings)
+
+    return build
+
+
+# 이름: {"build": 백엔드, "baseline": 비교 대상 백엔드, "tolerance": 허용 최대 위치/속도
+# 오차 (None 이면 비교하지 않음), "same_neighbours": 매 단계 기본 설정과 같은 이웃 사용 여부}.
+# 행 재배치와 스킨 격자는 Gauss-Seidel 점성의 쌍 순서를 바꿉니다. 쌍 순서는 계산 방식의
+# 일부라 (반올림 차이가 아님) 상태가 기준과 점점 달라지므로, 상태 대신 매 단계의 이웃과
+# 밀도를 검사합니다. Jacobi 점성은 다른 방식이라 기준과는 안정성만 검사하고, 배열
+# 경로의 Jacobi 는 객체별 Jacobi 기준과 비트 단위로 같아야 합니다.
+BACKENDS = {
+    "reference": {"build": _standalone({}), "baseline": "reference", "tolerance": 0.0},
+    "array": {"build": _stored({}), "baseline": "reference", "tolerance": 0.0},
+    "array-reorder": {
+        "build": _stored({"reorder_every": 5}),
+        "baseline": "reference",
+        "tolerance": None,
+        "same_neighbours": True,
+    },
+    "array-skin": {
+        "build": _stored({"grid_cell_size": R + SPACING * 0.125, "skin": SPACING * 0.25}),
+        "baseline": "reference",
+        "tolerance": None,
+        "same_neighbours": True,
+    },
+    "jacobi": {
+        "build": _standalone({"viscosity_mode": "jacobi"}),
+        "baseline": "reference",
+        "tolerance": None,
+    },
+    "array-jacobi": {
+        "build": _stored({"viscosity_mode": "jacobi"}),
+        "baseline": "jacobi",
+        "tolerance": 0.0,
+    },
+}
+
+
+def register_backend(
+    name: str, build, tolerance=None, baseline: str = "reference", same_neighbours: bool = False
+) -> None:
+    """
+    백엔드를 추가합니다.
+
+    Args:
+        name (str): 표에 표시할 이름
+        build: 시작 위치 리스트를 받아 (입자 리스트, 한 단계를 계산하는 함수) 를 반환하는 함수.
+            입자는 x_pos, y_pos, x_vel, y_vel, mass 속성을 가져야 하며, 오차는 build 가
+            반환한 리스트의 순서 (시작 위치 순서) 로 비교합니다.
+        tolerance (float | None): baseline 과의 허용 최대 위치/속도 오차, None 이면 보고만 함
+        baseline (str): 비교 대상 백엔드 이름
+        same_neighbours (bool): 매 단계 기본 설정과 같은 이웃과 밀도를 쓰는지 검사할지 여부.
+            입자에 previous_x_pos, previous_y_pos, rho, rho_near 속성이 있어야 합니다.
+    """
+    BACKENDS[name] = {
+        "build": build,
+        "baseline": baseline,
+        "tolerance": tolerance,
+        "same_neighbours": same_neighbours,
+    }
+
+
+def _columns(particles: list) -> tuple:
+    """
+    (x_pos, y_pos, x_vel, y_vel, mass) 값 목록. 입자들이 한 저장소를 이루면 열을 그대로,
+    아니면 입자 속성에서 읽습니다 (합의 순서가 바뀌어도 아래 검사는 순서와 무관함).
+    """
+    store = shared_store(particles) if all(hasattr(p, "_store") for p in particles) else None
+    if store is not None:
+        return store.x_pos, store.y_pos, store.x_vel, store.y_vel, store.mass
+    return (
+        [p.x_pos for p in particles],
+        [p.y_pos for p in particles],
+        [p.x_vel for p in particles],
+        [p.y_vel for p in particles],
+        [p.mass for p in particles],
+    )
+
+
+def energy(particles: list) -> float:
+    """운동 에너지와 중력 위치 에너지의 합."""
+    gravity = get_parameters()["G"]
+    x_pos, y_pos, x_vel, y_vel, mass = _columns(particles)
+    return sum(
+        m * (0.5 * (vx * vx + vy * vy) + gravity * (y - BOTTOM))
+        for y, vx, vy, m in zip(y_pos, x_vel, y_vel, mass)
+    )
+
+
+def momentum(particles: list) -> tuple[float, float]:
+    x_pos, y_pos, x_vel, y_vel, mass = _columns(particles)
+    return (sum(m * vx for m, vx in zip(mass, x_vel)), sum(m * vy for m, vy in zip(mass, y_vel)))
+
+
+def stable(particles: list) -> bool:
+    """
+    값이 모두 유한하고, 벽 밖이나 바닥 아래로 DOMAIN_MARGIN 넘게 나간 입자가
+    MAX_OUTSIDE_FRACTION 이하이며, 질량 가중 RMS 속도가 MAX_RMS_SPEED 이하인지 여부.
+    발산한 실행은 입자가 속도 제한에 붙어 영역 밖으로 흩어집니다.
+    """
+    total_mass = 0.0
+    kinetic = 0.0
+    outside = 0
+    for x, y, vx, vy, m in zip(*_columns(particles)):
+        if not (isfinite(x) and isfinite(y) and isfinite(vx) and isfinite(vy)):
+            return False
+        if abs(x) > SIM_W + DOMAIN_MARGIN or y < BOTTOM - DOMAIN_MARGIN:
+            outside += 1
+        total_mass += m
+        kinetic += m * (vx * vx + vy * vy)
+    return (
+        outside <= MAX_OUTSIDE_FRACTION * len(particles)
+        and kinetic <= MAX_RMS_SPEED * MAX_RMS_SPEED * total_mass
+    )
+
+
+def run(build, positions: list, steps: int, same_neighbours: bool = False) -> dict:
+    """
+    백엔드로 steps 단계를 실행합니다. 검사에 쓰는 시간은 seconds 에 넣지 않습니다.
+
+    Returns:
+        dict: seconds, 시작 순서의 최종 필드 값 (fields), energy_drift (에너지 변화),
+            momentum (최종 운동량), unstable_step (처음 stable() 이 아니게 된 단계, 없으면
+            None), neighbour_error (same_neighbours 일 때 단계별 step_error 의 최대, 아니면 None)
+    """
+    particles, step = build(positions)
+    initial_order = list(particles)
+    energy_before = energy(particles)
+    unstable_step = None
+    neighbour_error = 0.0 if same_neighbours else None
+    seconds = 0.0
+    for number in range(1, steps + 1):
+        begin = time.perf_counter()
+        step()
+        seconds += time.perf_counter() - begin
+        if same_neighbours:
+            neighbour_error = max(neighbour_error, step_error(initial_order))
+        if unstable_step is None and not stable(initial_order):
+            unstable_step = number
+    return {
+        "seconds": seconds,
+        "fields": {field: [getattr(p, field) for p in initial_order] for field in FIELDS},
+        "energy_drift": energy(initial_order) - energy_before,
+        "momentum": momentum(initial_order),
+        "unstable_step": unstable_step,
+        "neighbour_error": neighbour_error,
+    }
+
+
+def field_errors(reference: list[float], values: list[float]) -> tuple[float, float]:
+    """(최대 절대 오차, RMS 오차). 값이 유한하지 않으면 둘 다 inf."""
+    if not all(isfinite(value) for value in values):
+        return float("inf"), float("inf")
+    squared = [(value - expected) ** 2 for value, expected in zip(values, reference)]
+    return sqrt(max(squared, default=0.0)), sqrt(sum(squared) / max(len(squared), 1))
+
+
+def compare(steps: int = 10, count: int = 300, backends=None) -> list[dict]:
+    """
+    모든 장면에서 backends (기본은 등록된 전체) 를 실행해 기준 백엔드와 비교합니다.
+
+    Returns:
+        list[dict]: 장면/백엔드별 결과. 키는 scene, backend, seconds, speedup,
+            baseline, errors ({필드: (최대, RMS)}, baseline 기준), energy_drift,
+            momentum_error (baseline 의 최종 운동량과의 차이 크기. 중력과 벽/바닥 반력은
+            두 실행에 거의 같게 작용하므로 이 차이는 입자 사이 교환의 차이를 나타냄),
+            unstable_step, neighbour_error, passed (안정성과 백엔드의 검사를 모두 통과했는지)
+    """
+    names = list(BACKENDS) if backends is None else list(backends)
+    # 비교 대상 백엔드도 실행
+    for name in list(names):
+        baseline = BACKENDS[name]["baseline"]
+        if baseline not in names:
+            names.insert(names.index(name), baseline)
+    if "reference" not in names:
+        names.insert(0, "reference")
+    rows = []
+    for scene, make_positions in scenes(count).items():
+        positions = make_positions()
+        results = {}
+        for name in names:
+            if name not in results:
+                backend = BACKENDS[name]
+                results[name] = run(
+                    backend["build"], positions, steps, backend.get("same_neighbours", False)
+                )
+        for name in names:
+            result = results[name]
+            baseline = results[BACKENDS[name]["baseline"]]
+            tolerance = BACKENDS[name]["tolerance"]
+            neighbour_error = result["neighbour_error"]
+            errors = {
+                field: field_errors(baseline["fields"][field], result["fields"][field])
+                for field in FIELDS
+            }
+            worst = max(error[0] for error in errors.values())
+            passed = result["unstable_step"] is None
+            if tolerance is not None:
+                passed = passed and worst <= tolerance
+            if neighbour_error is not None:
+                passed = passed and neighbour_error <= TOLERANCE
+            seconds = result["seconds"]
+            rows.append({
+                "scene": scene,
+                "backend": name,
+                "baseline": BACKENDS[name]["baseline"],
+                "seconds": seconds,
+                "speedup": results["reference"]["seconds"] / seconds if seconds else float("inf"),
+                "errors": errors,
+                "energy_drift": result["energy_drift"],
+                "momentum_error": sqrt(
+                    (result["momentum"][0] - baseline["momentum"][0]) ** 2
+                    + (result["momentum"][1] - baseline["momentum"][1]) ** 2
+                ),
+                "unstable_step": result["unstable_step"],
+                "neighbour_error": neighbour_error,
+                "passed": passed,
+            })
+    return rows
+
+
+def format_table(rows: list[dict]) -> str:
+    """compare() 결과를 텍스트 표로 만듭니다."""
+    header = (
+        "scene", "backend", "baseline", "time s", "speedup", "max pos", "rms pos",
+        "max vel", "rms vel", "energy drift", "momentum vs baseline", "neighbours",
+        "unstable at", "status",
+    )
+    lines = []
+    for row in rows:
+        errors = row["errors"]
+        lines.append((
+            row["scene"],
+            row["backend"],
+            row["baseline"],
+            f"{row['seconds']:.3f}",
+            f"{row['speedup']:.2f}x",
+            f"{max(errors['x_pos'][0], errors['y_pos'][0]):.3g}",
+            f"{max(errors['x_pos'][1], errors['y_pos'][1]):.3g}",
+            f"{max(errors['x_vel'][0], errors['y_vel'][0]):.3g}",
+            f"{max(errors['x_vel'][1], errors['y_vel'][1]):.3g}",
+            f"{row['energy_drift']:.4g}",
+            f"{row['momentum_error']:.4g}",
+            "-" if row["neighbour_error"] is None else f"{row['neighbour_error']:.3g}",
+            "-" if row["unstable_step"] is None else f"step {row['unstable_step']}",
+            "ok" if row["passed"] else "FAIL",
+        ))
+    widths = [max(len(str(line[k])) for line in [header] + lines) for k in range(len(header))]
+    return "\n".join(
+        "  ".join(str(value).ljust(width) for value, width in zip(line, widths)).rstrip()
+        for line in [header] + lines
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare simulation backends against the reference.")
+    parser.add_argument("--steps", type=int, default=10, help="steps per run")
+    parser.add_argument("--count", type=int, default=300, help="number of particles")
+    parser.add_argument("--backend", action="append", help="backend to run (repeatable, default all)")
+    args = parser.parse_args()
+
+    rows = compare(args.steps, args.count, args.backend)
+    print(format_table(rows))
+    if not all(row["passed"] for row in rows):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import zlib
+from array import array
+from collections import deque
+
+from particle_ import FIELDS, Particle, ParticleStore
+from physics import shared_store
+
+
+# 값 하나의 바이트 수 (array('d'))
+_ITEM_SIZE = 8
+
+
+def _snapshot(particles: list[Particle]) -> bytes:
+    """입자 상태를 FIELDS 순서의 열들을 이어 붙인 바이트열로 만듭니다."""
+    store = shared_store(particles)
+    if store is not None and store.views == particles:
+        return b"".join(getattr(store, field).tobytes() for field in FIELDS)
+    return b"".join(
+        array("d", [getattr(particle, field) for particle in particles]).tobytes()
+        for field in FIELDS
+    )
+
+
+def _xor(data: bytes, base: bytes) -> bytes:
+    """같은 길이 두 바이트열의 XOR."""
+    return (
+        int.from_bytes(data, "little") ^ int.from_bytes(base, "little")
+    ).to_bytes(len(data), "little")
+
+
+def _shuffle(data: bytes) -> bytes:
+    """
+    float64 의 같은 자리 바이트끼리 모읍니다. 부호/지수 바이트와 XOR 로 0 이 된
+    상위 바이트가 연속되어 zlib 압축이 잘 됩니다.
+    """
+    return b"".join(data[k::_ITEM_SIZE] for k in range(_ITEM_SIZE))
+
+
+def _unshuffle(data: bytes) -> bytes:
+    count = len(data) // _ITEM_SIZE
+    result = bytearray(len(data))
+    for k in range(_ITEM_SIZE):
+        result[k::_ITEM_SIZE] = data[k * count:(k + 1) * count]
+    return bytes(result)
+
+
+class HistoryBuffer:
+    """
+    최근 시뮬레이션 상태를 보관하는 되감기용 링 버퍼.
+
+    keyframe_every 프레임마다 전체 상태 (키프레임) 를, 그 사이에는 직전 프레임과의
+    XOR 차이 (델타) 를 압축해 저장합니다. 압축된 크기의 합이 max_bytes 를 넘으면
+    가장 오래된 키프레임 묶음 (키프레임과 그 뒤의 델타들) 부터 버립니다.
+    max_bytes 는 엄격한 상한입니다: 현재 묶음 하나만으로도 넘으면 그 묶음의 가장
+    오래된 프레임을 버리고 다음 프레임을 키프레임으로 다시 압축하며, 프레임 하나가
+    max_bytes 보다 크면 아무것도 남기지 않습니다.
+
+    Args:
+        max_bytes (int): 압축된 프레임들이 차지할 수 있는 최대 바이트 수
+        keyframe_every (int): 키프레임 간격 (프레임 수)
+        level (int): zlib 압축 수준
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, keyframe_every: int = 30, level: int = 1):
+        self.max_bytes = max_bytes
+        self.keyframe_every = keyframe_every
+        self.level = level
+        # 키프레임 묶음의 deque. 묶음은 [첫 프레임 번호, 입자 수, [압축된 프레임, ...]]
+        self._groups = deque()
+        self._last = None
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return sum(len(group[2]) for group in self._groups)
+
+    @property
+    def first(self):
+        """저장된 가장 오래된 프레임 번호 (없으면 None)."""
+        return self._groups[0][0] if self._groups else None
+
+    @property
+    def last(self):
+        """저장된 가장 최근 프레임 번호 (없으면 None)."""
+        if not self._groups:
+            return None
+        first, _, frames = self._groups[-1]
+        return first + len(frames) - 1
+
+    def __contains__(self, frame: int) -> bool:
+        return bool(self._groups) and self.first <= frame <= self.last
+
+    def record(self, particles: list[Particle], frame: int) -> None:
+        """
+        프레임 상태를 저장합니다. 프레임 번호는 직전 저장 프레임 다음 번호여야 하며,
+        이전 번호이면 (되감은 뒤 이어가는 경우) 그 이후 기록을 지우고,
+        중간을 건너뛴 번호이면 모든 기록을 지웁니다.
+        """
+        if self._groups and frame != self.last + 1:
+            if frame <= self.last:
+                self.truncate_after(frame - 1)
+            else:
+                self.clear()
+        data = _snapshot(particles)
+        group = self._groups[-1] if self._groups else None
+        if (
+            group is None
+            or len(group[2]) >= self.keyframe_every
+            or group[1] != len(particles)
+        ):
+            compressed = zlib.compress(_shuffle(data), self.level)
+            self._groups.append([frame, len(particles), [compressed]])
+        else:
+            compressed = zlib.compress(_shuffle(_xor(data, self._last)), self.level)
+            group[2].append(compressed)
+        self._last = data
+        self.nbytes += len(compressed)
+
+        # 오래된 묶음부터 버리고, 현재 묶음만 남으면 그 앞쪽 프레임부터 버림
+        while self.nbytes > self.max_bytes:
+            if len(self._groups) > 1 or len(self._groups[0][2]) == 1:
+                _, _, frames = self._groups.popleft()
+                self.nbytes -= sum(len(compressed) for compressed in frames)
+                if not self._groups:
+                    self._last = None
+                    break
+            else:
+                self._drop_first_frame()
+
+    def _drop_first_frame(self) -> None:
+        """첫 묶음의 첫 프레임을 버리고 다음 프레임을 키프레임으로 다시 압축합니다."""
+        first, count, frames = self._groups[0]
+        _, data = self._raw(first + 1)
+        keyframe = zlib.compress(_shuffle(data), self.level)
+        self.nbytes += len(keyframe) - len(frames[0]) - len(frames[1])
+        self._groups[0] = [first + 1, count, [keyframe] + frames[2:]]
+
+    def _raw(self, frame: int) -> tuple[int, bytes]:
+        if frame not in self:
+            raise KeyError(f"Frame {frame} is not stored")
+        for first, count, frames in self._groups:
+            if frame < first + len(frames):
+                data = _unshuffle(zlib.decompress(frames[0]))
+                for compressed in frames[1:frame - first + 1]:
+                    data = _xor(_unshuffle(zlib.decompress(compressed)), data)
+                return count, data
+
+    def restore(self, frame: int) -> list[Particle]:
+        """
+        저장된 프레임의 상태로 새 입자 리스트 (새 ParticleStore) 를 만듭니다.
+        반환된 리스트로 update() 를 이어 호출하면 그 프레임부터 다시 시뮬레이션합니다.
+        """
+        count, data = self._raw(frame)
+        store = ParticleStore()
+        particles = [store.add(0.0, 0.0) for _ in range(count)]
+        column_size = count * _ITEM_SIZE
+        for index, field in enumerate(FIELDS):
+            column = array("d")
+            column.frombytes(data[index * column_size:(index + 1) * column_size])
+            setattr(store, field, column)
+        return particles
+
+    def clear(self) -> None:
+        """모든 기록을 지웁니다."""
+        self._groups.clear()
+        self._last = None
+        self.nbytes = 0
+
+    def truncate_after(self, frame: int) -> None:
+        """frame 이후에 저장된 프레임을 지웁니다 (되감은 지점부터 다시 기록할 때)."""
+        while self._groups and self._groups[-1][0] > frame:
+            _, _, frames = self._groups.pop()
+            self.nbytes -= sum(len(compressed) for compressed in frames)
+        if self._groups:
+            first, _, frames = self._groups[-1]
+            while first + len(frames) - 1 > frame:
+                self.nbytes -= len(frames.pop())
+        self._last = self._raw(self.last)[1] if self._groups else None
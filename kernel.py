@@ -0,0 +1,76 @@
+from math import sqrt
+
+from config import Config
+
+
+(
+    N,
+    SIM_W,
+    BOTTOM,
+    DAM,
+    DAM_BREAK,
+    G,
+    SPACING,
+    K,
+    K_NEAR,
+    REST_DENSITY,
+    R,
+    SIGMA,
+    MAX_VEL,
+    WALL_DAMP,
+    VEL_DAMP,
+    GRID_CELL_SIZE
+) = Config().return_config()
+
+R_SQ = R * R
+
+
+def kernel_terms(dx: float, dy: float, distance_sq: float) -> tuple:
+    """
+    한 입자 쌍의 커널 값을 한 번에 계산합니다.
+    q = distance / R 일 때 (1 - q), (1 - q)^2, (1 - q)^3 을 곱셈만으로 만듭니다.
+
+    Args:
+        dx, dy (float): 입자에서 이웃 입자로 향하는 벡터
+        distance_sq (float): dx^2 + dy^2
+
+    Returns:
+        tuple: (dx, dy, distance, (1 - q), (1 - q)^2, (1 - q)^3)
+    """
+    distance = sqrt(distance_sq)
+    w1 = 1 - distance / R
+    w2 = w1 * w1
+    return (dx, dy, distance, w1, w2, w2 * w1)
+
+
+def pair_kernel(dx: float, dy: float):
+    """
+    제곱 거리로 먼저 R 밖의 쌍을 걸러낸 뒤 (sqrt 없이) 커널 값을 계산합니다.
+
+    Returns:
+        tuple | None: kernel_terms 의 결과, 이웃이 아니면 None
+    """
+    distance_sq = dx * dx + dy * dy
+    if distance_sq >= R_SQ:
+        return None
+    return kernel_terms(dx, dy, distance_sq)
+
+
+def neighbor_kernels(particle) -> list[tuple]:
+    """
+    particle.neighbors 와 같은 순서의 커널 값 목록을 반환합니다.
+    calculate_density 가 채워 둔 particle.neighbor_kernels 를 재사용하고,
+    이웃 목록이 따로 지정된 경우에만 새로 계산합니다. neighbors 에 대입하면
+    neighbor_kernels 가 비워지고, 목록을 제자리에서 고쳐 길이가 달라진 경우에도
+    새로 계산합니다.
+    """
+    kernels = particle.neighbor_kernels
+    if len(kernels) == len(particle.neighbors):
+        return kernels
+    kernels = []
+    for neighbor in particle.neighbors:
+        dx = neighbor.x_pos - particle.x_pos
+        dy = neighbor.y_pos - particle.y_pos
+        kernels.append(kernel_terms(dx, dy, dx * dx + dy * dy))
+    particle.neighbor_kernels = kernels
+    return particle.neighbor_kernels
@@ -1,14 +1,11 @@
-import numpy as np
+import os
 from config import Config
-from particle_ import Particle
 import pygame
-from physics import (
-    start,
-    calculate_density,
-    create_pressure,
-    calculate_viscosity,
-    create_grid
-)
+from autotune import load_tuned
+from history import HistoryBuffer
+from stream import StreamServer
+from adaptive import adapt_resolution
+from physics import start, update, get_parameters, set_parameters
 
 (
     N,
@@ -29,35 +26,6 @@ from physics import (
     GRID_CELL_SIZE
 ) = Config().return_config()
 
-def update(particles: list[Particle], dam: bool) -> list[Particle]:
-    """
-    Calculates one step of the simulation.
-    """
-    # 1. 힘 초기화, 중력가속도 적용, 벽과의 상호작용
-    for particle in particles:
-        particle.force = np.array([0.0, -G], dtype=float)
-        #particle.update_state(dam) # 여기에서 불리면 안됨
-
-    # 2. 밀도 계산
-    grid = create_grid(particles, GRID_CELL_SIZE)
-    calculate_density(particles, grid, GRID_CELL_SIZE)
-
-    # 3. 압력 계산
-    for particle in particles:
-        particle.calculate_pressure()
-
-    # 4. 압력 힘 적용
-    create_pressure(particles)
-
-    # 5. 점성 힘 적용
-    calculate_viscosity(particles)
-
-    # 6. 업데이트된 힘을 바탕으로 update_state 호출
-    for particle in particles:
-        particle.update_state(dam)
-
-    return particles
-
 # Pygame 설정
 pygame.init()
 screen_width = int(2.75 * SIM_W * 100)
@@ -68,6 +36,38 @@ particle_radius = int(SPACING * 50)  # 필요에 따라 입자 크기 조정
 
 simulation_state = start(-SIM_W, SIM_W, BOTTOM+1, 0.03, N)
 
+# autotune.py 로 이 기계에 맞춘 설정이 있으면 사용
+settings = load_tuned() or {}
+step_cache = {}
+
+# SPH_FLUID_STREAM_PORT 가 지정되면 원격 뷰어용 스트리밍 서버 시작
+stream_server = None
+if os.environ.get("SPH_FLUID_STREAM_PORT"):
+    stream_server = StreamServer(
+        os.environ.get("SPH_FLUID_STREAM_HOST", "127.0.0.1"),
+        int(os.environ["SPH_FLUID_STREAM_PORT"]),
+    ).start()
+
+# SPH_FLUID_ADAPT_EVERY 가 지정되면 그 프레임 수마다 잔잔한 내부 입자를 병합하고
+# 자유 표면/튀는 영역의 무거운 입자를 분할함 (adaptive.py)
+adapt_every = int(os.environ.get("SPH_FLUID_ADAPT_EVERY", "0"))
+
+# 되감기용 기록. 스페이스: 일시정지/재개, 일시정지 중 ←/→: 프레임 이동,
+# 1/2: SIGMA, 3/4: K_NEAR, 5/6: WALL_DAMP 를 10% 감소/증가.
+# 되감은 프레임에서 재개하면 그 이후 기록을 버리고 바뀐 파라미터로 다시 시뮬레이션함
+history = HistoryBuffer()
+parameter_keys = {
+    pygame.K_1: ("SIGMA", 0.9),
+    pygame.K_2: ("SIGMA", 1.1),
+    pygame.K_3: ("K_NEAR", 0.9),
+    pygame.K_4: ("K_NEAR", 1.1),
+    pygame.K_5: ("WALL_DAMP", 0.9),
+    pygame.K_6: ("WALL_DAMP", 1.1),
+}
+paused = False
+view_frame = None  # 일시정지 중 보고 있는 기록 프레임
+shown_state = None
+
 frame = 0
 dam_built = False
 running = True
@@ -82,21 +82,53 @@ while running:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
-
-    simulation_state = update(simulation_state, dam_built)
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                paused = not paused
+                if not paused and view_frame is not None:
+                    # 보고 있던 프레임부터 다시 시뮬레이션
+                    simulation_state = history.restore(view_frame)
+                    history.truncate_after(view_frame)
+                    frame = view_frame + 1
+                    step_cache = {}
+                view_frame = None
+                shown_state = None
+            elif paused and event.key in (pygame.K_LEFT, pygame.K_RIGHT) and len(history):
+                current = view_frame if view_frame is not None else history.last
+                step = -1 if event.key == pygame.K_LEFT else 1
+                view_frame = min(max(current + step, history.first), history.last)
+                shown_state = history.restore(view_frame)
+            elif event.key in parameter_keys:
+                name, factor = parameter_keys[event.key]
+                set_parameters(**{name: get_parameters()[name] * factor})
+                pygame.display.set_caption(
+                    "2D SPH particle interaction simulation - "
+                    + ", ".join(f"{key}={value:.4g}" for key, value in get_parameters().items())
+                )
+
+    if not paused:
+        if adapt_every > 0 and frame % adapt_every == 0:
+            simulation_state = adapt_resolution(simulation_state)
+            step_cache = {}
+        simulation_state = update(simulation_state, dam_built, cache=step_cache, **settings)
+        history.record(simulation_state, frame)
+        if stream_server is not None:
+            stream_server.publish(simulation_state, frame)
+        frame += 1
 
     # 화면 지우기
     screen.fill((0, 0, 0))
 
     # 입자 그리기
-    for particle in simulation_state:
+    for particle in shown_state if shown_state is not None else simulation_state:
         screen_x, screen_y = sim_to_screen(particle.visual_x_pos, particle.visual_y_pos)
         pygame.draw.circle(screen, (0, 0, 255), (screen_x, screen_y), particle_radius)
 
     # 화면 업데이트
     pygame.display.flip()
 
-    frame += 1
     pygame.time.delay(5)  # 애니메이션 속도에 맞게 지연 시간 조정
 
+if stream_server is not None:
+    stream_server.stop()
 pygame.quit()
\ No newline at end of file
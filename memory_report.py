@@ -0,0 +1,123 @@
+"""
+Bytes per particle and attribute access cost before and after the array-backed
+particle store.
+
+"before" is the previous Particle layout: one object with an instance __dict__
+holding every field and its own neighbour list. "after" is a ParticleStore with
+one array('d') column per field plus a __slots__ Particle view per row, measured
+both for start() (one store per scene) and for standalone Particle(x, y) objects
+(each with its own one-row store, so they cost more).
+
+Reading or writing an attribute of a view goes through a property, so it is
+slower than a plain attribute. Loops over many particles should read the store
+columns instead (see query.py and history.py).
+
+    python memory_report.py [count]
+"""
+
+import sys
+import timeit
+import tracemalloc
+
+from config import Config
+from particle_ import Particle
+from physics import start
+
+
+(
+    N,
+    SIM_W,
+    BOTTOM,
+    DAM,
+    DAM_BREAK,
+    G,
+    SPACING,
+    K,
+    K_NEAR,
+    REST_DENSITY,
+    R,
+    SIGMA,
+    MAX_VEL,
+    WALL_DAMP,
+    VEL_DAMP,
+    GRID_CELL_SIZE
+) = Config().return_config()
+
+
+class LegacyParticle:
+    """이전 Particle 과 같은 속성 구성의 __dict__ 객체 (비교용)."""
+
+    def __init__(self, x_pos: float, y_pos: float):
+        self.x_pos = x_pos
+        self.y_pos = y_pos
+        self.previous_x_pos = x_pos
+        self.previous_y_pos = y_pos
+        self.visual_x_pos = x_pos
+        self.visual_y_pos = y_pos
+        self.rho = 0.0
+        self.rho_near = 0.0
+        self.press = 0.0
+        self.press_near = 0.0
+        self.neighbors = []
+        self.neighbor_kernels = []
+        self.x_vel = 0.0
+        self.y_vel = 0.0
+        self.x_force = 0.0
+        self.y_force = -G
+
+
+def measure(build) -> int:
+    """build() 가 할당한 뒤 남아 있는 바이트 수."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return size
+
+
+def legacy(count: int) -> list:
+    # 이전 start() 처럼 위치를 누적하여 필드마다 서로 다른 float 객체를 가짐
+    result = []
+    x_pos, y_pos = -SIM_W, BOTTOM + 1
+    for _ in range(count):
+        result.append(LegacyParticle(x_pos, y_pos))
+        x_pos += 0.03
+        if x_pos > SIM_W - 1:
+            x_pos = -SIM_W
+            y_pos += 0.03
+    return result
+
+
+def access_cost(particle) -> tuple[float, float]:
+    """particle.x_pos 읽기와 particle.x_vel 쓰기 한 번의 시간 (ns, 5 번 중 최소)."""
+    number = 200000
+    names = {"particle": particle}
+    read = timeit.repeat("particle.x_pos", globals=names, number=number, repeat=5)
+    write = timeit.repeat("particle.x_vel = 0.5", globals=names, number=number, repeat=5)
+    return min(read) / number * 1e9, min(write) / number * 1e9
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else N
+    positions = legacy(count)
+    before = measure(lambda: legacy(count))
+    after = measure(lambda: start(-SIM_W, SIM_W, BOTTOM + 1, 0.03, count))
+    single = measure(
+        lambda: [Particle(particle.x_pos, particle.y_pos) for particle in positions]
+    )
+    print(f"{count} particles")
+    print(f"before (__dict__ objects)      : {before / count:7.1f} bytes per particle")
+    print(f"after  (start(), store + views): {after / count:7.1f} bytes per particle")
+    print(f"after  (standalone Particle)   : {single / count:7.1f} bytes per particle")
+    print(f"reduction                      : {before / after:7.2f}x / {before / single:.2f}x")
+    legacy_read, legacy_write = access_cost(positions[0])
+    view_read, view_write = access_cost(start(0.0, 1.0, 0.0, 0.1, 1)[0])
+    print(f"attribute read  (before / after): {legacy_read:5.1f} / {view_read:5.1f} ns")
+    print(f"attribute write (before / after): {legacy_write:5.1f} / {view_write:5.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
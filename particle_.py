@@ -1,3 +1,4 @@
+from array import array
 from math import sqrt
 from config import Config
 
@@ -22,8 +23,226 @@ from config import Config
 ) = Config().return_config()
 
 
+# ParticleStore 의 열 (column) 이름. Particle 의 같은 이름 속성이 이 열의 한 행을 가리킴
+FIELDS = (
+    "x_pos",
+    "y_pos",
+    "previous_x_pos",
+    "previous_y_pos",
+    "visual_x_pos",
+    "visual_y_pos",
+    "rho",
+    "rho_near",
+    "press",
+    "press_near",
+    "x_vel",
+    "y_vel",
+    "x_force",
+    "y_force",
+    "mass",
+    "self_kernel",
+)
+
+
+class ParticleStore:
+    """
+    입자 상태를 필드마다 하나의 array('d') 열로 보관하는 저장소.
+    i 번째 입자의 값은 각 열의 i 번째 행이며, Particle 은 한 행에 대한 뷰입니다.
+
+    속성:
+    FIELDS 의 각 이름: 해당 필드의 array('d') 열
+    neighbors: 행마다의 이웃 Particle 목록 (Particle.neighbors), 처음 쓸 때 만들어짐
+    neighbor_kernels: 행마다의 쌍 커널 값 목록 (Particle.neighbor_kernels), 처음 쓸 때 만들어짐
+    pair_start, pair_rows, pair_kernels: array_physics 의 이웃 목록 (CSR 형식).
+        계산한 rows 의 k 번째 행의 이웃은 pair_rows[pair_start[k]:pair_start[k + 1]] 이고
+        같은 위치의 pair_kernels 가 그 커널 값입니다.
+    views: 행 순서의 Particle 뷰 목록
+
+    배열 경로는 입자마다 목록을 만들지 않고 저장소 전체에 하나의 평탄한 이웃 목록을 씁니다.
+    """
+
+    def __init__(self):
+        for field in FIELDS:
+            setattr(self, field, array("d"))
+        self.neighbors = []
+        self.neighbor_kernels = []
+        self.pair_start = []
+        self.pair_rows = []
+        self.pair_kernels = []
+        self.views = []
+
+    def __len__(self) -> int:
+        return len(self.views)
+
+    def append_row(self, x_pos: float, y_pos: float, view: "Particle") -> int:
+        """새 입자 행을 추가하고 행 번호를 반환합니다."""
+        for field in ("x_pos", "previous_x_pos", "visual_x_pos"):
+            getattr(self, field).append(x_pos)
+        for field in ("y_pos", "previous_y_pos", "visual_y_pos"):
+            getattr(self, field).append(y_pos)
+        for field in ("rho", "rho_near", "press", "press_near", "x_vel", "y_vel", "x_force"):
+            getattr(self, field).append(0.0)
+        self.y_force.append(-G)
+        self.mass.append(1.0)
+        self.self_kernel.append(0.0)
+        self.neighbors.append(None)
+        self.neighbor_kernels.append(None)
+        self.views.append(view)
+        return len(self.views) - 1
+
+    def add(self, x_pos: float, y_pos: float) -> "Particle":
+        """새 입자를 추가하고 그 뷰를 반환합니다."""
+        return Particle(x_pos, y_pos, self)
+
+    def reorder(self, order: list[int]) -> None:
+        """
+        행을 order 순서로 재배치합니다 (새 i 행 = 이전 order[i] 행).
+        뷰는 같은 입자를 계속 가리키도록 행 번호가 갱신됩니다.
+        """
+        for field in FIELDS:
+            column = getattr(self, field)
+            setattr(self, field, array("d", [column[i] for i in order]))
+        for name in ("neighbors", "neighbor_kernels", "views"):
+            rows = getattr(self, name)
+            setattr(self, name, [rows[i] for i in order])
+        for index, view in enumerate(self.views):
+            view._index = index
+        # 행 번호가 바뀌었으므로 배열 경로의 이웃 목록은 무효
+        self.clear_pairs()
+
+    def clear_pairs(self) -> None:
+        """배열 경로의 이웃 목록을 비웁니다."""
+        self.pair_start.clear()
+        self.pair_rows.clear()
+        self.pair_kernels.clear()
+
+    def calculate_pressures(self, rows=None) -> None:
+        """rows (None 이면 모든 행) 의 밀도로 압력과 근접 압력을 계산합니다."""
+        press, press_near = self.press, self.press_near
+        rho, rho_near = self.rho, self.rho_near
+        for i in range(len(self)) if rows is None else rows:
+            press[i] = K * (rho[i] - REST_DENSITY)
+            press_near[i] = K_NEAR * rho_near[i]
+
+    def update_states(self, dam: bool, dt: float = 1.0, rows=None) -> None:
+        """
+        rows (None 이면 모든 행) 를 Velocity Verlet 으로 한 단계 진행하고
+        벽 제약 조건에 따른 다음 단계의 힘을 설정합니다.
+        """
+        x_pos, y_pos = self.x_pos, self.y_pos
+        previous_x_pos, previous_y_pos = self.previous_x_pos, self.previous_y_pos
+        visual_x_pos, visual_y_pos = self.visual_x_pos, self.visual_y_pos
+        x_vel, y_vel = self.x_vel, self.y_vel
+        x_force, y_force = self.x_force, self.y_force
+        neighbors, neighbor_kernels = self.neighbors, self.neighbor_kernels
+        for i in range(len(self)) if rows is None else rows:
+            # 이전 위치 보존
+            previous_x_pos[i] = x_pos[i]
+            previous_y_pos[i] = y_pos[i]
+
+            # 1. 이전 속도와 현재 힘을 이용하여 속도의 절반 단계를 계산 (half-step velocity)
+            half_x_vel = x_vel[i] + 0.5 * dt * x_force[i]
+            half_y_vel = y_vel[i] + 0.5 * dt * y_force[i]
+
+            # 2. 절반 단계의 속도를 사용하여 위치 업데이트
+            x = x_pos[i] + half_x_vel * dt
+            y = y_pos[i] + half_y_vel * dt
+            x_pos[i] = x
+            y_pos[i] = y
+
+            # 3. 새로운 위치에서의 힘 계산은 바깥 (physics.update) 에서 해 줄 예정
+
+            # 4. 새로운 위치에서 계산된 힘을 사용하여 속도 업데이트
+            vx = half_x_vel + 0.5 * dt * x_force[i]
+            vy = half_y_vel + 0.5 * dt * y_force[i]
+
+            # 화면에 표시되는 시각적 위치 설정
+            visual_x_pos[i] = x
+            visual_y_pos[i] = y
+
+            # force 초기화
+            fx, fy = 0.0, -G
+
+            # 속도가 너무 높으면 감소시킴
+            velocity = sqrt(vx**2 + vy**2)
+            if velocity > MAX_VEL:
+                reduction_ratio = MAX_VEL / velocity
+                vx *= reduction_ratio
+                vy *= reduction_ratio
+            x_vel[i] = vx
+            y_vel[i] = vy
+
+            # 벽 제약 조건
+            if x < -SIM_W:
+                fx -= 0.3 * (x - -SIM_W) * WALL_DAMP
+                visual_x_pos[i] = -SIM_W
+            if dam is True and x > DAM:
+                fx -= (x - DAM) * WALL_DAMP
+            if x > SIM_W:
+                fx -= 0.3 * (x - SIM_W) * WALL_DAMP
+                visual_x_pos[i] = SIM_W
+            if y < BOTTOM:
+                fy -= 0.7 * (y - SIM_W) * WALL_DAMP
+                visual_y_pos[i] = BOTTOM
+            x_force[i] = fx
+            y_force[i] = fy
+
+            # 밀도는 초기화하지 않음: 다음 calculate_density 가 새로 계산하므로,
+            # 그 전까지 rho / rho_near 는 마지막으로 계산한 밀도를 유지함 (렌더링/스트리밍용)
+
+            # 이웃 입자 목록 초기화 (이전 목록은 그대로 두고 다음에 읽을 때 새로 만듦)
+            if neighbors[i] is not None:
+                neighbors[i] = None
+            if neighbor_kernels[i] is not None:
+                neighbor_kernels[i] = None
+        self.clear_pairs()
+
+
+def _column_property(field: str) -> property:
+    """
+    ParticleStore 열의 한 행을 읽고 쓰는 속성.
+    도구와 기준 구현의 반복문에서 자주 불리므로, getattr(store, field) 로 열을 찾지 않도록
+    열 이름을 넣은 함수를 만듭니다 (속성 읽기 비용이 절반 정도로 줄어듦).
+    """
+    namespace = {}
+    exec(
+        f"def getter(self):\n"
+        f"    return self._store.{field}[self._index]\n"
+        f"def setter(self, value):\n"
+        f"    self._store.{field}[self._index] = value\n",
+        namespace,
+    )
+    return property(namespace["getter"], namespace["setter"])
+
+
+def _list_property(name: str, invalidates: str = None) -> property:
+    """
+    ParticleStore 의 행별 목록 속성. 목록은 처음 읽을 때 만들어지고,
+    대입한 목록은 복사하지 않고 그대로 보관합니다.
+    invalidates 가 주어지면 대입할 때 그 이름의 행별 목록을 비웁니다.
+    """
+
+    def getter(self):
+        rows = getattr(self._store, name)
+        values = rows[self._index]
+        if values is None:
+            values = rows[self._index] = []
+        return values
+
+    def setter(self, value):
+        getattr(self._store, name)[self._index] = value
+        if invalidates is not None:
+            getattr(self._store, invalidates)[self._index] = None
+
+    return property(getter, setter)
+
+
 class Particle:
     """
+    ParticleStore 한 행에 대한 가벼운 뷰 (__slots__, 인스턴스 __dict__ 없음).
+    store 를 지정하지 않으면 입자 하나만 담은 저장소를 새로 만듭니다 (입자와 함께
+    해제됨). 저장소를 공유하는 많은 입자는 start() 나 ParticleStore.add 로 만드세요.
+
     속성:
     x_pos: 입자의 x 위치
     y_pos: 입자의 y 위치
@@ -36,32 +255,32 @@ class Particle:
     press: 입자의 압력
     press_near: 입자의 근접 압력, 입자 간 충돌 방지에 사용됨
     neighbors: 입자의 이웃 입자 목록
+    neighbor_kernels: neighbors 와 같은 순서의 쌍 커널 값 (kernel.kernel_terms)
     x_vel: 입자의 x 속도
     y_vel: 입자의 y 속도
     x_force: 입자에 가해지는 x 방향 힘
     y_force: 입자에 가해지는 y 방향 힘
+    mass: 입자의 질량 (기본값 1.0, 적응 해상도에서 병합/분할 시 변함)
+    self_kernel: 병합된 입자 안에 합쳐진 쌍의 커널 값 1 - d/R. 밀도에 자기 항
+        (mass - 1) * self_kernel^2 로 더해지며, 질량 1 이면 쓰이지 않음
     """
 
-    def __init__(self, x_pos: float, y_pos: float):
-        self.x_pos = x_pos
-        self.y_pos = y_pos
-        self.previous_x_pos = x_pos
-        self.previous_y_pos = y_pos
-        self.visual_x_pos = x_pos
-        self.visual_y_pos = y_pos
-        self.rho = 0.0
-        self.rho_near = 0.0
-        self.press = 0.0
-        self.press_near = 0.0
-        self.neighbors = []
-        self.x_vel = 0.0
-        self.y_vel = 0.0
-        self.x_force = 0.0
-        self.y_force = -G
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, x_pos: float, y_pos: float, store: ParticleStore = None):
+        if store is None:
+            store = ParticleStore()
+        self._store = store
+        self._index = store.append_row(x_pos, y_pos, self)
+
+    # 이웃 목록을 바꾸면 그 목록으로 계산한 커널 값은 무효
+    neighbors = _list_property("neighbors", invalidates="neighbor_kernels")
+    neighbor_kernels = _list_property("neighbor_kernels")
 
     def update_state(self, dam: bool, dt: float = 1.0):
         """
         Updates the particle's state using the Velocity Verlet integration method.
+        ParticleStore.update_states does the same for whole rows of a store.
 
         Args:
             dam (bool): Indicates whether the dam is present.
@@ -80,7 +299,7 @@ class Particle:
         self.x_pos += half_x_vel * dt
         self.y_pos += half_y_vel * dt
 
-        # 3. 새로운 위치에서의 힘 계산은 바깥(main.py)에서 해 줄 예정
+        # 3. 새로운 위치에서의 힘 계산은 바깥 (physics.update) 에서 해 줄 예정
 
         # 4. 새로운 위치에서 계산된 힘을 사용하여 속도 업데이트
         self.x_vel = half_x_vel + 0.5 * dt * self.x_force
@@ -89,7 +308,7 @@ class Particle:
         # 화면에 표시되는 시각적 위치 설정
         self.visual_x_pos = self.x_pos
         self.visual_y_pos = self.y_pos
-        
+
         # force 초기화
         (self.x_force, self.y_force) = (0.0, -G)
 
@@ -115,9 +334,8 @@ class Particle:
             self.y_force -= 0.7 * (self.y_pos - SIM_W) * WALL_DAMP
             self.visual_y_pos = BOTTOM
 
-        # 밀도 초기화
-        self.rho = 0.0
-        self.rho_near = 0.0
+        # 밀도는 초기화하지 않음: 다음 calculate_density 가 새로 계산하므로,
+        # 그 전까지 rho / rho_near 는 마지막으로 계산한 밀도를 유지함 (렌더링/스트리밍용)
 
         # 이웃 입자 목록 초기화
         self.neighbors = []
@@ -127,4 +345,9 @@ class Particle:
         입자의 압력을 계산
         """
         self.press = K * (self.rho - REST_DENSITY)
-        self.press_near = K_NEAR * self.rho_near
\ No newline at end of file
+        self.press_near = K_NEAR * self.rho_near
+
+
+for _field in FIELDS:
+    setattr(Particle, _field, _column_property(_field))
+
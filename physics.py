@@ -1,7 +1,9 @@
-from math import sqrt
+import sys
 
+import array_physics
 from config import Config
-from particle_ import Particle
+from kernel import R_SQ, kernel_terms, neighbor_kernels
+from particle_ import Particle, ParticleStore
 
 
 (
@@ -24,6 +26,44 @@ from particle_ import Particle
 ) = Config().return_config()
 
 
+# 실행 중에 set_parameters 로 바꿀 수 있는 물리 파라미터
+TUNABLE_PARAMETERS = ("G", "K", "K_NEAR", "REST_DENSITY", "SIGMA", "MAX_VEL", "WALL_DAMP")
+
+
+def get_parameters() -> dict:
+    """현재 적용 중인 TUNABLE_PARAMETERS 값을 반환합니다."""
+    module = sys.modules[__name__]
+    return {name: getattr(module, name) for name in TUNABLE_PARAMETERS}
+
+
+def set_parameters(**values: float) -> dict:
+    """
+    물리 파라미터를 실행 중에 바꿉니다. Config 를 import 해 값을 풀어 둔 모든
+    모듈 (render, adaptive 등 나중에 import 된 모듈 포함) 의 값을 함께 바꾸므로
+    다음 update() 부터 적용됩니다. 파라미터에서 유도한 값은 모듈 수준 상수로 두지 말고
+    쓸 때 계산해야 합니다.
+
+    Args:
+        **values: TUNABLE_PARAMETERS 중 바꿀 이름과 값 (예: SIGMA=1.0)
+
+    Returns:
+        dict: 바꾸기 전 값
+    """
+    unknown = set(values) - set(TUNABLE_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    previous = {name: value for name, value in get_parameters().items() if name in values}
+    modules = [
+        module for module in list(sys.modules.values())
+        if getattr(module, "Config", None) is Config
+    ]
+    for module in modules:
+        for name, value in values.items():
+            if hasattr(module, name):
+                setattr(module, name, value)
+    return previous
+
+
 def start(
     xmin: float, xmax: float, ymin: float, space: float, count: int
 ) -> list[Particle]:
@@ -41,12 +81,13 @@ def start(
         count (int): 입자 수
 
     Returns:
-        list: Particle 객체 리스트
+        list: 하나의 ParticleStore 를 공유하는 Particle 뷰 리스트
     """
+    store = ParticleStore()
     result = []
     x_pos, y_pos = xmin, ymin
     for _ in range(count):
-        result.append(Particle(x_pos, y_pos))
+        result.append(store.add(x_pos, y_pos))
         x_pos += space
         if x_pos > xmax-1:
             x_pos = xmin
@@ -57,6 +98,8 @@ def start(
 def calculate_density(particles: list[Particle], grid: dict, grid_cell_size: float) -> None:
     """
     Calculates the density and near-density of each particle.
+    Each neighbour contributes its kernel weight scaled by its mass, and a merged
+    particle adds the pairs merged inside it through self_kernel.
 
     Args:
         particles (list[Particle]): The list of particles.
@@ -64,9 +107,13 @@ def calculate_density(particles: list[Particle], grid: dict, grid_cell_size: flo
         grid_cell_size (float): The size of each grid cell.
     """
     for particle in particles:
-        particle.rho = 0.0
-        particle.rho_near = 0.0
+        # Self term: exactly 0.0 for unit mass
+        inner = particle.mass - 1.0
+        w1 = particle.self_kernel
+        particle.rho = inner * w1 * w1
+        particle.rho_near = particle.rho * w1
         particle.neighbors = []
+        particle.neighbor_kernels = []
 
         cell_x = int((particle.x_pos + SIM_W) / grid_cell_size)
         cell_y = int((particle.y_pos + SIM_W) / grid_cell_size)
@@ -77,15 +124,16 @@ def calculate_density(particles: list[Particle], grid: dict, grid_cell_size: flo
                 if (i, j) in grid:
                     for neighbor in grid[(i, j)]:
                         if particle != neighbor:  # Exclude self
-                            distance = sqrt(
-                                (particle.x_pos - neighbor.x_pos) ** 2
-                                + (particle.y_pos - neighbor.y_pos) ** 2
-                            )
-                            if distance < R:
-                                normal_distance = 1 - distance / R
-                                particle.rho += normal_distance**2
-                                particle.rho_near += normal_distance**3
+                            dx = neighbor.x_pos - particle.x_pos
+                            dy = neighbor.y_pos - particle.y_pos
+                            distance_sq = dx * dx + dy * dy
+                            # Reject on squared distance before taking the sqrt
+                            if distance_sq < R_SQ:
+                                kernel = kernel_terms(dx, dy, distance_sq)
+                                particle.rho += neighbor.mass * kernel[4]
+                                particle.rho_near += neighbor.mass * kernel[5]
                                 particle.neighbors.append(neighbor)
+                                particle.neighbor_kernels.append(kernel)
 
 
 def create_pressure(particles: list[Particle]) -> None:
@@ -94,6 +142,8 @@ def create_pressure(particles: list[Particle]) -> None:
         calculate_density 함수에서 이웃 리스트와 압력이 이미 계산됨
         각 이웃 입자의 압력 힘을 합산하여 압력 힘을 계산하고,
         이웃 입자 방향으로 힘을 적용합니다.
+        쌍의 힘은 두 입자 질량의 곱에 비례하고 가속도는 힘 / 질량이므로,
+        각 입자는 상대 입자의 질량만큼 가속되며 운동량이 보존됩니다.
 
     Args:
         particles (list[Particle]): 입자 리스트
@@ -101,70 +151,177 @@ def create_pressure(particles: list[Particle]) -> None:
     for particle in particles:
         press_x = 0.0
         press_y = 0.0
-        for neighbor in particle.neighbors:
-            particle_to_neighbor = [
-                neighbor.x_pos - particle.x_pos,
-                neighbor.y_pos - particle.y_pos,
-            ]
-            distance = sqrt(particle_to_neighbor[0] ** 2 + particle_to_neighbor[1] ** 2)
-            normal_distance = 1 - distance / R
-            total_pressure = (
-                particle.press + neighbor.press
-            ) * normal_distance**2 + (
+        for neighbor, kernel in zip(particle.neighbors, neighbor_kernels(particle)):
+            dx, dy, distance, _, w2, w3 = kernel
+            total_pressure = (particle.press + neighbor.press) * w2 + (
                 particle.press_near + neighbor.press_near
-            ) * normal_distance**3
-            pressure_vector = [
-                particle_to_neighbor[0] * total_pressure / distance,
-                particle_to_neighbor[1] * total_pressure / distance,
-            ]
-            neighbor.x_force += pressure_vector[0]
-            neighbor.y_force += pressure_vector[1]
-            press_x += pressure_vector[0]
-            press_y += pressure_vector[1]
+            ) * w3
+            pressure_x = dx * total_pressure / distance
+            pressure_y = dy * total_pressure / distance
+            neighbor.x_force += pressure_x * particle.mass
+            neighbor.y_force += pressure_y * particle.mass
+            press_x += pressure_x * neighbor.mass
+            press_y += pressure_y * neighbor.mass
         particle.x_force -= press_x
         particle.y_force -= press_y
 
 
-def calculate_viscosity(particles: list[Particle]) -> None:
+def calculate_viscosity(particles: list[Particle], mode: str = "gauss_seidel") -> None:
     """
     입자의 점성 힘을 계산합니다.
     힘 = (입자 간 상대 거리) * (점성 가중치) * (입자 간 속도 차이)
     속도 차이는 입자 사이의 벡터를 기반으로 계산됩니다.
+    쌍이 주고받는 운동량은 두 질량의 곱에 비례하고 각 입자의 속도는 상대 입자의
+    질량만큼 바뀌므로 운동량이 보존됩니다 (같은 질량 1 이면 절반씩). 병합된 입자의
+    쌍은 나뉘어 있을 때의 m_i * m_j 개 쌍이 주던 충격량을 함께 전달하되, 접근 속도는
+    질량 1 인 쌍 하나보다 (또는 멈추는 것보다) 더 줄이지 않습니다. Gauss-Seidel 에서는
+    나뉜 쌍 중 첫 쌍이 이미 접근을 멈추게 해 나머지 쌍은 충격량을 주지 않기 때문입니다.
+
+    mode="gauss_seidel" 은 순회하면서 속도를 바로 갱신하므로 결과가 입자 순서에
+    의존합니다. mode="jacobi" 는 같은 감쇠 계수의 암시적 식을 속도 스냅샷에서 시작하는
+    Jacobi 반복으로 풀고 쌍 충격량을 scatter-add 로 한 번에 적용하므로 순서와 무관하며,
+    Gauss-Seidel 한 번과 비슷한 만큼 감쇠합니다.
 
     Args:
         particles (list[Particle]): 입자 리스트
+        mode (str): "gauss_seidel" 또는 "jacobi"
     """
-
+    if mode == "jacobi":
+        _calculate_viscosity_jacobi(particles)
+        return
+    if mode != "gauss_seidel":
+        raise ValueError(f"Unknown viscosity mode: {mode}")
     for particle in particles:
-        for neighbor in particle.neighbors:
-            particle_to_neighbor = [
-                neighbor.x_pos - particle.x_pos,
-                neighbor.y_pos - particle.y_pos,
-            ]
-            distance = sqrt(particle_to_neighbor[0] ** 2 + particle_to_neighbor[1] ** 2)
-            normal_p_to_n = [
-                particle_to_neighbor[0] / distance,
-                particle_to_neighbor[1] / distance,
-            ]
-            relative_distance = distance / R
-            velocity_difference = (particle.x_vel - neighbor.x_vel) * normal_p_to_n[
-                0
-            ] + (particle.y_vel - neighbor.y_vel) * normal_p_to_n[1]
+        for neighbor, kernel in zip(particle.neighbors, neighbor_kernels(particle)):
+            dx, dy, distance, w1, _, _ = kernel
+            normal_x = dx / distance
+            normal_y = dy / distance
+            velocity_difference = (particle.x_vel - neighbor.x_vel) * normal_x + (
+                particle.y_vel - neighbor.y_vel
+            ) * normal_y
             if velocity_difference > 0:
-                viscosity_force = [
-                    (1 - relative_distance)
-                    * SIGMA
-                    * velocity_difference
-                    * normal_p_to_n[0],
-                    (1 - relative_distance)
-                    * SIGMA
-                    * velocity_difference
-                    * normal_p_to_n[1],
-                ]
-                particle.x_vel -= viscosity_force[0] * 0.5
-                particle.y_vel -= viscosity_force[1] * 0.5
-                neighbor.x_vel += viscosity_force[0] * 0.5
-                neighbor.y_vel += viscosity_force[1] * 0.5
+                impulse = w1 * SIGMA * velocity_difference * 0.5
+                m_i, m_j = particle.mass, neighbor.mass
+                if m_i != 1.0 or m_j != 1.0:
+                    # 상대 속도는 impulse * (m_i + m_j) 만큼 줄어듦
+                    weight = w1 * SIGMA
+                    reduction = min(weight * (m_i + m_j) * 0.5, max(weight, 1.0))
+                    impulse = reduction * velocity_difference / (m_i + m_j)
+                impulse_particle = impulse * m_j
+                impulse_neighbor = impulse * m_i
+                particle.x_vel -= impulse_particle * normal_x
+                particle.y_vel -= impulse_particle * normal_y
+                neighbor.x_vel += impulse_neighbor * normal_x
+                neighbor.y_vel += impulse_neighbor * normal_y
+
+
+def _calculate_viscosity_jacobi(particles: list[Particle]) -> None:
+    """
+    Jacobi 방식의 점성 계산. 접근 중인 쌍 (속도 스냅샷에서 velocity_difference > 0)
+    마다 Gauss-Seidel 과 같은 감쇠 계수를 쓰되, 충격량을 점성을 적용한 뒤의 속도로
+    계산하는 암시적 식을 array_physics.JACOBI_SWEEPS 번의 가중 Jacobi 반복
+    (입자마다 2x2 블록) 으로 풀고, 그 속도로 계산한 쌍 충격량을 scatter-add 로
+    적용합니다. 모든 반복은 이전 반복의 값만 읽으므로 결과는 입자 순서와 무관합니다.
+    """
+    count = len(particles)
+    index = {id(particle): i for i, particle in enumerate(particles)}
+    x_vel = [particle.x_vel for particle in particles]
+    y_vel = [particle.y_vel for particle in particles]
+    mass = [particle.mass for particle in particles]
+
+    # 접근 중인 쌍: (i, j, normal_x, normal_y, 상대 속도 감소 계수 / (m_i + m_j))
+    active = []
+    for i, particle in enumerate(particles):
+        for neighbor, kernel in zip(particle.neighbors, neighbor_kernels(particle)):
+            j = index[id(neighbor)]
+            dx, dy, distance, w1, _, _ = kernel
+            normal_x = dx / distance
+            normal_y = dy / distance
+            velocity_difference = (x_vel[i] - x_vel[j]) * normal_x + (
+                y_vel[i] - y_vel[j]
+            ) * normal_y
+            if velocity_difference > 0:
+                m_i, m_j = mass[i], mass[j]
+                reduction = w1 * SIGMA
+                if m_i != 1.0 or m_j != 1.0:
+                    reduction = min(reduction * (m_i + m_j) * 0.5, max(reduction, 1.0))
+                active.append((i, j, normal_x, normal_y, reduction / (m_i + m_j)))
+    if not active:
+        return
+
+    # 암시적 식 v'_i = v_i - sum(c_ij * m_j * n n^T (v'_i - v'_j)) 의 2x2 대각 블록
+    diagonal_xx = [1.0] * count
+    diagonal_xy = [0.0] * count
+    diagonal_yy = [1.0] * count
+    for i, j, normal_x, normal_y, coefficient in active:
+        for row, weight in ((i, coefficient * mass[j]), (j, coefficient * mass[i])):
+            diagonal_xx[row] += weight * normal_x * normal_x
+            diagonal_xy[row] += weight * normal_x * normal_y
+            diagonal_yy[row] += weight * normal_y * normal_y
+
+    solved_x, solved_y = x_vel, y_vel
+    for _ in range(array_physics.JACOBI_SWEEPS):
+        right_x = x_vel[:]
+        right_y = y_vel[:]
+        for i, j, normal_x, normal_y, coefficient in active:
+            along_j = (solved_x[j] * normal_x + solved_y[j] * normal_y) * coefficient * mass[j]
+            along_i = (solved_x[i] * normal_x + solved_y[i] * normal_y) * coefficient * mass[i]
+            right_x[i] += along_j * normal_x
+            right_y[i] += along_j * normal_y
+            right_x[j] += along_i * normal_x
+            right_y[j] += along_i * normal_y
+        previous_x, previous_y = solved_x, solved_y
+        solved_x = [0.0] * count
+        solved_y = [0.0] * count
+        for row in range(count):
+            xx, xy, yy = diagonal_xx[row], diagonal_xy[row], diagonal_yy[row]
+            determinant = xx * yy - xy * xy
+            jacobi_x = (yy * right_x[row] - xy * right_y[row]) / determinant
+            jacobi_y = (xx * right_y[row] - xy * right_x[row]) / determinant
+            weight = array_physics.JACOBI_WEIGHT
+            solved_x[row] = previous_x[row] + weight * (jacobi_x - previous_x[row])
+            solved_y[row] = previous_y[row] + weight * (jacobi_y - previous_y[row])
+
+    # 풀어 낸 속도의 접근 속도로 쌍 충격량을 계산해 scatter-add
+    delta_x = [0.0] * count
+    delta_y = [0.0] * count
+    for i, j, normal_x, normal_y, coefficient in active:
+        velocity_difference = (solved_x[i] - solved_x[j]) * normal_x + (
+            solved_y[i] - solved_y[j]
+        ) * normal_y
+        if velocity_difference > 0:
+            impulse = coefficient * velocity_difference
+            impulse_i = impulse * mass[j]
+            impulse_j = impulse * mass[i]
+            delta_x[i] -= impulse_i * normal_x
+            delta_y[i] -= impulse_i * normal_y
+            delta_x[j] += impulse_j * normal_x
+            delta_y[j] += impulse_j * normal_y
+    for i, particle in enumerate(particles):
+        particle.x_vel = x_vel[i] + delta_x[i]
+        particle.y_vel = y_vel[i] + delta_y[i]
+
+
+def particle_rows(particles: list[Particle]) -> tuple:
+    """
+    입자들이 속한 저장소와 리스트 순서의 행 번호를 반환합니다.
+
+    Returns:
+        tuple: (ParticleStore, list[int]), 입자가 없으면 (None, [])
+
+    Raises:
+        ValueError: 입자들이 서로 다른 저장소에 있을 때
+    """
+    if not particles:
+        return None, []
+    store = particles[0]._store
+    rows = []
+    for particle in particles:
+        if particle._store is not store:
+            raise ValueError("All particles must belong to the same ParticleStore")
+        rows.append(particle._index)
+    return store, rows
+
 
 def create_grid(particles: list[Particle], grid_cell_size: float) -> dict:
     grid = {}
@@ -175,4 +332,209 @@ def create_grid(particles: list[Particle], grid_cell_size: float) -> dict:
         if cell_coords not in grid:
             grid[cell_coords] = []
         grid[cell_coords].append(particle)
-    return grid
\ No newline at end of file
+    return grid
+
+
+def grid_key(particle: Particle, grid_cell_size: float) -> tuple[int, int]:
+    """create_grid 와 같은 규칙으로 입자가 속한 셀 좌표를 반환합니다."""
+    return (
+        int((particle.x_pos + SIM_W) / grid_cell_size),
+        int((particle.y_pos + SIM_W) / grid_cell_size),
+    )
+
+
+def shared_store(particles: list[Particle]):
+    """
+    모든 입자가 한 ParticleStore 의 모든 행을 이루면 그 저장소를, 아니면 None 을 반환합니다.
+    """
+    if not particles:
+        return None
+    store = particles[0]._store
+    if len(store) != len(particles):
+        return None
+    for particle in particles:
+        if particle._store is not store:
+            return None
+    return store
+
+
+def update(
+    particles: list[Particle],
+    dam: bool,
+    grid_cell_size: float = GRID_CELL_SIZE,
+    skin: float = 0.0,
+    reorder_every: int = 0,
+    viscosity_mode: str = "gauss_seidel",
+    backend: str = "auto",
+    cache: dict = None,
+) -> list[Particle]:
+    """
+    Calculates one step of the simulation.
+
+    backend="array" 는 입자들의 저장소 행 위에서 array_physics 로 계산하며, 모든 입자가
+    한 ParticleStore 에 있어야 합니다 (start() 로 만든 경우). backend="objects" 는 이
+    모듈의 Particle 객체용 함수 (기준 구현) 로 계산합니다. "auto" 는 모든 입자가 한
+    저장소에 있으면 "array", 아니면 (따로 만든 Particle 들) "objects" 를 고릅니다.
+    두 경로는 같은 순서로 계산하므로 결과가 비트 단위로 같습니다.
+
+    Args:
+        particles (list[Particle]): 입자 리스트
+        dam (bool): 댐 존재 여부
+        grid_cell_size (float): 격자 셀 크기, R + skin / 2 이상이어야 3x3 셀 탐색이 정확함
+        skin (float): 0 보다 크면 입자가 마지막 격자 생성 이후 skin / 2 이상 움직이기
+            전까지 격자를 재사용합니다. cache 가 필요합니다.
+        reorder_every (int): 0 보다 크면 이 단계 수마다 입자 (저장소 행) 를 셀 순서로 정렬
+        viscosity_mode (str): calculate_viscosity 의 mode
+        backend (str): "auto", "array" 또는 "objects"
+        cache (dict): 단계 사이에 유지되는 격자 재사용 상태, 호출자가 보관
+    """
+    if grid_cell_size < R + skin / 2:
+        raise ValueError("grid_cell_size must be at least R + skin / 2")
+    if backend not in ("auto", "array", "objects"):
+        raise ValueError(f"Unknown backend: {backend}")
+    if cache is None:
+        cache = {}
+    step = cache.get("step", 0)
+    cache["step"] = step + 1
+    if not particles:
+        return particles
+    if backend == "auto":
+        store = particles[0]._store
+        same_store = all(particle._store is store for particle in particles)
+        backend = "array" if same_store else "objects"
+    if cache.get("backend") != backend:
+        # 다른 경로가 만든 격자는 쓰지 않음
+        cache.pop("grid", None)
+        cache["backend"] = backend
+    if backend == "objects":
+        return _update_objects(
+            particles, dam, grid_cell_size, skin, reorder_every, viscosity_mode, cache, step
+        )
+    store, rows = particle_rows(particles)
+    x_pos, y_pos = store.x_pos, store.y_pos
+
+    # 1. 힘 초기화, 중력가속도 적용, 벽과의 상호작용은 이전 단계의 update_states 에서 처리됨
+
+    # 입자를 셀 순서로 정렬하여 이웃 입자가 메모리에서도 가깝게 함
+    if reorder_every > 0 and step % reorder_every == 0:
+        keys = [
+            (int((x_pos[i] + SIM_W) / grid_cell_size), int((y_pos[i] + SIM_W) / grid_cell_size))
+            for i in rows
+        ]
+        order = sorted(range(len(rows)), key=keys.__getitem__)
+        if shared_store(particles) is store:
+            # 저장소의 행 자체를 재배치
+            store.reorder([rows[k] for k in order])
+            particles[:] = store.views
+            x_pos, y_pos = store.x_pos, store.y_pos
+        else:
+            particles[:] = [particles[k] for k in order]
+        rows = [particle._index for particle in particles]
+        cache.pop("grid", None)
+
+    # 2. 밀도 계산
+    grid = None
+    if skin > 0.0:
+        positions = [(x_pos[i], y_pos[i]) for i in rows]
+        grid = cache.get("grid")
+        if (
+            grid is not None
+            and cache["owner"] is particles
+            and cache["grid_cell_size"] == grid_cell_size
+            and cache["rows"] == rows
+        ):
+            limit_sq = (skin / 2) ** 2
+            for (x, y), (x_built, y_built) in zip(positions, cache["positions"]):
+                if (x - x_built) ** 2 + (y - y_built) ** 2 > limit_sq:
+                    grid = None
+                    break
+        else:
+            grid = None
+    if grid is None:
+        grid = array_physics.create_row_grid(store, grid_cell_size, rows)
+        if skin > 0.0:
+            cache["grid"] = grid
+            cache["owner"] = particles
+            cache["grid_cell_size"] = grid_cell_size
+            cache["rows"] = rows
+            cache["positions"] = positions
+
+    array_physics.calculate_density(store, grid, grid_cell_size, rows)
+
+    # 3. 압력 계산
+    store.calculate_pressures(rows)
+
+    # 4. 압력 힘 적용
+    array_physics.create_pressure(store, rows)
+
+    # 5. 점성 힘 적용
+    array_physics.calculate_viscosity(store, viscosity_mode, rows)
+
+    # 6. 업데이트된 힘을 바탕으로 위치와 속도 갱신
+    store.update_states(dam, rows=rows)
+
+    return particles
+
+
+def _update_objects(
+    particles: list[Particle],
+    dam: bool,
+    grid_cell_size: float,
+    skin: float,
+    reorder_every: int,
+    viscosity_mode: str,
+    cache: dict,
+    step: int,
+) -> list[Particle]:
+    """update() 의 Particle 객체 경로. 인자는 update() 를 참고하세요."""
+    # 1. 힘 초기화, 중력가속도 적용, 벽과의 상호작용은 이전 단계의 update_state 에서 처리됨
+
+    # 입자를 셀 순서로 정렬하여 이웃 입자가 메모리에서도 가깝게 함
+    if reorder_every > 0 and step % reorder_every == 0:
+        particles.sort(key=lambda particle: grid_key(particle, grid_cell_size))
+        cache.pop("grid", None)
+
+    # 2. 밀도 계산
+    grid = None
+    if skin > 0.0:
+        positions = [(particle.x_pos, particle.y_pos) for particle in particles]
+        grid = cache.get("grid")
+        if (
+            grid is not None
+            and cache["owner"] is particles
+            and cache["grid_cell_size"] == grid_cell_size
+            and cache["members"] == particles
+        ):
+            limit_sq = (skin / 2) ** 2
+            for (x, y), (x_built, y_built) in zip(positions, cache["positions"]):
+                if (x - x_built) ** 2 + (y - y_built) ** 2 > limit_sq:
+                    grid = None
+                    break
+        else:
+            grid = None
+    if grid is None:
+        grid = create_grid(particles, grid_cell_size)
+        if skin > 0.0:
+            cache["grid"] = grid
+            cache["owner"] = particles
+            cache["grid_cell_size"] = grid_cell_size
+            cache["members"] = list(particles)
+            cache["positions"] = positions
+
+    calculate_density(particles, grid, grid_cell_size)
+
+    # 3. 압력 계산
+    for particle in particles:
+        particle.calculate_pressure()
+
+    # 4. 압력 힘 적용
+    create_pressure(particles)
+
+    # 5. 점성 힘 적용
+    calculate_viscosity(particles, viscosity_mode)
+
+    # 6. 업데이트된 힘을 바탕으로 위치와 속도 갱신
+    for particle in particles:
+        particle.update_state(dam)
+
+    return particles
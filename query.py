@@ -0,0 +1,237 @@
+from math import sqrt
+
+from config import Config
+from particle_ import Particle
+from kernel import R_SQ
+from physics import create_grid, shared_store
+
+
+(
+    N,
+    SIM_W,
+    BOTTOM,
+    DAM,
+    DAM_BREAK,
+    G,
+    SPACING,
+    K,
+    K_NEAR,
+    REST_DENSITY,
+    R,
+    SIGMA,
+    MAX_VEL,
+    WALL_DAMP,
+    VEL_DAMP,
+    GRID_CELL_SIZE
+) = Config().return_config()
+
+
+class SpatialIndex:
+    """
+    create_grid 로 만든 격자를 이용하여 입자를 공간 질의하는 인덱스.
+    가상 센서(압력, 수위 등)를 매 프레임 모든 입자를 훑지 않고 샘플링할 때 사용합니다.
+
+    격자는 입자 위치의 스냅샷이므로, 입자가 움직인 뒤에는 새로 만들어야 합니다.
+    """
+
+    def __init__(
+        self,
+        particles: list[Particle],
+        grid: dict = None,
+        grid_cell_size: float = GRID_CELL_SIZE,
+    ):
+        self.particles = particles
+        self.grid_cell_size = grid_cell_size
+        self.grid = grid if grid is not None else create_grid(particles, grid_cell_size)
+        # 입자가 있는 셀들의 범위 (셀 좌표의 최솟값, 최댓값)
+        occupied = [cell for cell, members in self.grid.items() if members]
+        if occupied:
+            self.cell_bounds = (
+                min(i for i, _ in occupied),
+                min(j for _, j in occupied),
+                max(i for i, _ in occupied),
+                max(j for _, j in occupied),
+            )
+        else:
+            self.cell_bounds = None
+
+    def cell_of(self, x_pos: float, y_pos: float) -> tuple[int, int]:
+        """create_grid 와 같은 규칙으로 위치가 속한 셀 좌표를 반환합니다."""
+        return (
+            int((x_pos + SIM_W) / self.grid_cell_size),
+            int((y_pos + SIM_W) / self.grid_cell_size),
+        )
+
+    def _candidates(
+        self, xmin: float, ymin: float, xmax: float, ymax: float
+    ) -> list[Particle]:
+        """[xmin, xmax] x [ymin, ymax] 를 덮는 셀들의 입자를 모읍니다."""
+        if self.cell_bounds is None:
+            return []
+        # 입자가 있는 셀 범위 밖은 볼 필요가 없음
+        bound_xmin, bound_ymin, bound_xmax, bound_ymax = self.cell_bounds
+        cell_xmin, cell_ymin = self.cell_of(xmin, ymin)
+        cell_xmax, cell_ymax = self.cell_of(xmax, ymax)
+        cell_xmin, cell_ymin = max(cell_xmin, bound_xmin), max(cell_ymin, bound_ymin)
+        cell_xmax, cell_ymax = min(cell_xmax, bound_xmax), min(cell_ymax, bound_ymax)
+        result = []
+        for i in range(cell_xmin, cell_xmax + 1):
+            for j in range(cell_ymin, cell_ymax + 1):
+                cell = self.grid.get((i, j))
+                if cell:
+                    result.extend(cell)
+        return result
+
+    def in_box(
+        self, xmin: float, ymin: float, xmax: float, ymax: float
+    ) -> list[Particle]:
+        """
+        사각형 영역 안의 입자 목록을 반환합니다.
+
+        Args:
+            xmin, ymin, xmax, ymax (float): 영역 경계 (경계 포함)
+
+        Returns:
+            list[Particle]: 영역 안의 입자
+        """
+        return [
+            particle
+            for particle in self._candidates(xmin, ymin, xmax, ymax)
+            if xmin <= particle.x_pos <= xmax and ymin <= particle.y_pos <= ymax
+        ]
+
+    def in_radius(self, x_pos: float, y_pos: float, radius: float) -> list[Particle]:
+        """
+        (x_pos, y_pos) 로부터 radius 미만 거리에 있는 입자 목록을 반환합니다.
+        """
+        radius_sq = radius * radius
+        return [
+            particle
+            for particle in self._candidates(
+                x_pos - radius, y_pos - radius, x_pos + radius, y_pos + radius
+            )
+            if (particle.x_pos - x_pos) ** 2 + (particle.y_pos - y_pos) ** 2 < radius_sq
+        ]
+
+    def k_nearest(self, x_pos: float, y_pos: float, k: int) -> list[Particle]:
+        """
+        (x_pos, y_pos) 에 가장 가까운 입자 k 개를 가까운 순서로 반환합니다.
+        검색 반경을 셀 크기에서 시작해 두 배씩 늘려 갑니다.
+        """
+        if k <= 0 or not self.particles or self.cell_bounds is None:
+            return []
+        k = min(k, len(self.particles))
+
+        def distance_sq(particle: Particle) -> float:
+            return (particle.x_pos - x_pos) ** 2 + (particle.y_pos - y_pos) ** 2
+
+        # 입자가 있는 셀 범위의 가장 먼 모서리까지의 거리를 넘으면 더 늘릴 필요가 없음
+        bound_xmin, bound_ymin, bound_xmax, bound_ymax = self.cell_bounds
+        size = self.grid_cell_size
+        far_x = max(
+            abs(x_pos - (bound_xmin * size - SIM_W)),
+            abs(x_pos - ((bound_xmax + 1) * size - SIM_W)),
+        )
+        far_y = max(
+            abs(y_pos - (bound_ymin * size - SIM_W)),
+            abs(y_pos - ((bound_ymax + 1) * size - SIM_W)),
+        )
+        max_radius = sqrt(far_x * far_x + far_y * far_y)
+
+        radius = self.grid_cell_size
+        while True:
+            found = self.in_radius(x_pos, y_pos, radius)
+            # 반경 안에 k 개가 있으면 반경 밖의 입자는 더 가까울 수 없음
+            if len(found) >= k or radius >= max_radius:
+                found.sort(key=distance_sq)
+                return found[:k]
+            radius *= 2
+
+    def sample(
+        self, x_pos: float, y_pos: float
+    ) -> tuple[float, float, float, float]:
+        """
+        임의 위치에서 SPH 보간한 값을 반환합니다.
+        밀도는 calculate_density 와 같이 질량을 곱한 커널 합 m * (1 - q)^2 이고,
+        압력과 속도는 같은 가중치로 정규화한 이웃 입자 값의 평균입니다.
+
+        Returns:
+            tuple: (밀도, 압력, x 속도, y 속도). 반경 R 안에 입자가 없으면 모두 0.0
+        """
+        return self.sample_points([(x_pos, y_pos)])[0]
+
+    def sample_points(
+        self, points: list[tuple[float, float]]
+    ) -> list[tuple[float, float, float, float]]:
+        """
+        여러 위치를 한 번에 샘플링합니다.
+
+        입자 값 (위치, 질량, 압력, 속도) 은 한 번만 읽어 (입자들이 한 저장소를 이루면 열에서
+        바로) 크기 R 의 샘플링용 셀에 튜플로 담습니다. 격자 셀 (GRID_CELL_SIZE) 보다 작아
+        주변 3x3 셀의 후보 중 R 밖의 입자가 적습니다. 같은 셀에 속한 점들은 후보 목록을
+        공유하고, 후보는 kernel.py 처럼 제곱 거리로 먼저 걸러 R 안의 입자에만 sqrt 를
+        계산합니다.
+
+        Args:
+            points (list[tuple[float, float]]): 샘플링 위치 목록
+
+        Returns:
+            list[tuple]: 각 위치의 (밀도, 압력, x 속도, y 속도)
+        """
+        size = R
+        store = shared_store(self.particles)
+        if store is not None:
+            columns = (store.x_pos, store.y_pos, store.mass, store.press, store.x_vel, store.y_vel)
+        else:
+            columns = (
+                [p.x_pos for p in self.particles],
+                [p.y_pos for p in self.particles],
+                [p.mass for p in self.particles],
+                [p.press for p in self.particles],
+                [p.x_vel for p in self.particles],
+                [p.y_vel for p in self.particles],
+            )
+        cells = {}
+        for values in zip(*columns):
+            key = (int((values[0] + SIM_W) / size), int((values[1] + SIM_W) / size))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [values]
+            else:
+                cell.append(values)
+
+        candidates_by_cell = {}
+        result = []
+        for x_pos, y_pos in points:
+            key = (int((x_pos + SIM_W) / size), int((y_pos + SIM_W) / size))
+            candidates = candidates_by_cell.get(key)
+            if candidates is None:
+                candidates = []
+                cell_x, cell_y = key
+                for i in range(cell_x - 1, cell_x + 2):
+                    for j in range(cell_y - 1, cell_y + 2):
+                        cell = cells.get((i, j))
+                        if cell:
+                            candidates.extend(cell)
+                candidates_by_cell[key] = candidates
+
+            rho = 0.0
+            press = 0.0
+            x_vel = 0.0
+            y_vel = 0.0
+            for x, y, mass, p, vx, vy in candidates:
+                dx = x - x_pos
+                dy = y - y_pos
+                distance_sq = dx * dx + dy * dy
+                if distance_sq < R_SQ:
+                    w1 = 1 - sqrt(distance_sq) / R
+                    weight = mass * w1 * w1
+                    rho += weight
+                    press += weight * p
+                    x_vel += weight * vx
+                    y_vel += weight * vy
+            if rho > 0.0:
+                result.append((rho, press / rho, x_vel / rho, y_vel / rho))
+            else:
+                result.append((0.0, 0.0, 0.0, 0.0))
+        return result
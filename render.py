@@ -0,0 +1,327 @@
+"""
+Offline frame rendering.
+
+Saved frames (or a headless simulation) are rasterized into RGB buffers on a
+process pool and written as numbered PNG files or as one raw rgb24 video stream
+(e.g. `ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -i frames.rgb out.mp4`).
+"""
+
+import argparse
+import os
+import struct
+import zlib
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from math import sqrt
+
+from config import Config
+from particle_ import Particle
+from physics import shared_store, start, update
+
+
+(
+    N,
+    SIM_W,
+    BOTTOM,
+    DAM,
+    DAM_BREAK,
+    G,
+    SPACING,
+    K,
+    K_NEAR,
+    REST_DENSITY,
+    R,
+    SIGMA,
+    MAX_VEL,
+    WALL_DAMP,
+    VEL_DAMP,
+    GRID_CELL_SIZE
+) = Config().return_config()
+
+# main.py 의 화면 설정과 같은 배율 (시뮬레이션 단위 1 = 100 픽셀)
+SCALE = 100
+WIDTH = int(2.75 * SIM_W * SCALE)
+HEIGHT = int(1 * SIM_W * SCALE)
+PARTICLE_RADIUS = int(SPACING * 50)
+PARTICLE_COLOR = (0, 0, 255)
+# 프레임 파일 헤더. 배열 구성이 바뀌면 FRAME_VERSION 을 올림
+# (버전 1: x, y, 밀도, 질량. 그 전의 헤더 없는 파일은 x, y, 밀도 세 배열)
+FRAME_MAGIC = b"SPHF"
+FRAME_VERSION = 1
+
+
+def frame_from_particles(particles: list[Particle]) -> tuple[array, array, array, array]:
+    """
+    입자 리스트에서 렌더링에 필요한 값만 뽑아 프레임을 만듭니다.
+
+    입자들이 한 ParticleStore 를 이루면 입자 뷰를 거치지 않고 저장소 열을 리스트 순서로
+    복사합니다.
+
+    Returns:
+        tuple: (visual x 위치, visual y 위치, 밀도, 질량) array('d') 네 개.
+            밀도는 update() 의 마지막 calculate_density 결과입니다.
+    """
+    store = shared_store(particles)
+    if store is None:
+        return (
+            array("d", [particle.visual_x_pos for particle in particles]),
+            array("d", [particle.visual_y_pos for particle in particles]),
+            array("d", [particle.rho for particle in particles]),
+            array("d", [particle.mass for particle in particles]),
+        )
+    columns = (store.visual_x_pos, store.visual_y_pos, store.rho, store.mass)
+    rows = [particle._index for particle in particles]
+    if rows == list(range(len(rows))):
+        return tuple(array("d", column) for column in columns)
+    return tuple(array("d", [column[i] for i in rows]) for column in columns)
+
+
+def write_frame(path: str, frame: tuple[array, array, array, array]) -> None:
+    """
+    프레임을 바이너리 파일로 저장합니다. FRAME_MAGIC, 형식 버전, 입자 수 헤더 뒤에
+    x, y, 밀도, 질량 배열이 순서대로 옵니다.
+    """
+    with open(path, "wb") as file:
+        file.write(FRAME_MAGIC)
+        file.write(struct.pack("<II", FRAME_VERSION, len(frame[0])))
+        for values in frame:
+            file.write(values.tobytes())
+
+
+def read_frame(path: str) -> tuple[array, array, array, array]:
+    """
+    write_frame 으로 저장한 프레임을 읽습니다.
+
+    Raises:
+        ValueError: 헤더가 없거나 (예전 형식의 파일 포함) 버전이 다르거나 파일이 잘렸을 때
+    """
+    with open(path, "rb") as file:
+        header = file.read(len(FRAME_MAGIC) + 8)
+        if len(header) < len(FRAME_MAGIC) + 8 or not header.startswith(FRAME_MAGIC):
+            raise ValueError(f"Not a frame file: {path}")
+        version, count = struct.unpack("<II", header[len(FRAME_MAGIC):])
+        if version != FRAME_VERSION:
+            raise ValueError(f"Unsupported frame version {version}: {path}")
+        frame = []
+        for _ in range(4):
+            values = array("d")
+            data = file.read(count * values.itemsize)
+            if len(data) < count * values.itemsize:
+                raise ValueError(f"Truncated frame file: {path}")
+            values.frombytes(data)
+            frame.append(values)
+    return tuple(frame)
+
+
+def simulate(steps: int, every: int = 1, particles: list[Particle] = None):
+    """
+    화면 없이 시뮬레이션을 실행하며 every 단계마다 프레임을 하나씩 내보냅니다.
+    """
+    if particles is None:
+        particles = start(-SIM_W, SIM_W, BOTTOM + 1, 0.03, N)
+    for step in range(steps):
+        particles = update(particles, False)
+        if step % every == 0:
+            yield frame_from_particles(particles)
+
+
+def record(
+    directory: str, steps: int, every: int = 1, particles: list[Particle] = None
+) -> list[str]:
+    """
+    화면 없이 시뮬레이션을 실행하며 프레임을 파일로 저장합니다.
+
+    Returns:
+        list[str]: 저장된 프레임 파일 경로 (순서대로)
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for frame in simulate(steps, every, particles):
+        path = os.path.join(directory, f"frame_{len(paths):05d}.bin")
+        write_frame(path, frame)
+        paths.append(path)
+    return paths
+
+
+def sim_to_screen(x: float, y: float) -> tuple[int, int]:
+    """시뮬레이션 좌표를 화면 좌표로 변환합니다 (main.py 와 동일)."""
+    return int((x + SIM_W) * SCALE), int((SIM_W - y) * SCALE)
+
+
+def rasterize(
+    frame: tuple[array, array, array, array],
+    width: int = WIDTH,
+    height: int = HEIGHT,
+    density_field: bool = False,
+) -> bytearray:
+    """
+    프레임을 rgb24 이미지 버퍼로 그립니다.
+    density_field 가 True 이면 입자 아래에 질량을 곱한 커널 m * (1 - q)^2 로 평활화한
+    밀도장을 깝니다 (병합된 입자는 나뉜 입자들과 같은 밀도로 그려짐).
+    """
+    x_pos, y_pos, _, mass = frame
+    pixels = bytearray(width * height * 3)
+
+    if density_field:
+        field = [0.0] * (width * height)
+        reach = int(R * SCALE)
+        for x, y, m in zip(x_pos, y_pos, mass):
+            center_x, center_y = sim_to_screen(x, y)
+            for py in range(max(0, center_y - reach), min(height, center_y + reach + 1)):
+                row = py * width
+                for px in range(max(0, center_x - reach), min(width, center_x + reach + 1)):
+                    distance = sqrt((px - center_x) ** 2 + (py - center_y) ** 2) / SCALE
+                    if distance < R:
+                        field[row + px] += m * (1 - distance / R) ** 2
+        for i, value in enumerate(field):
+            if value > 0.0:
+                level = int(255 * min(value / REST_DENSITY, 1.0))
+                pixels[3 * i] = level // 4
+                pixels[3 * i + 1] = level // 2
+                pixels[3 * i + 2] = level // 2
+
+    red, green, blue = PARTICLE_COLOR
+    radius_sq = PARTICLE_RADIUS**2
+    for x, y in zip(x_pos, y_pos):
+        center_x, center_y = sim_to_screen(x, y)
+        for py in range(
+            max(0, center_y - PARTICLE_RADIUS), min(height, center_y + PARTICLE_RADIUS + 1)
+        ):
+            half = int(sqrt(radius_sq - (py - center_y) ** 2))
+            first = max(0, center_x - half)
+            last = min(width - 1, center_x + half)
+            for px in range(first, last + 1):
+                offset = 3 * (py * width + px)
+                pixels[offset] = red
+                pixels[offset + 1] = green
+                pixels[offset + 2] = blue
+    return pixels
+
+
+def encode_png(pixels: bytes, width: int, height: int) -> bytes:
+    """rgb24 버퍼를 PNG 바이트로 인코딩합니다."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    stride = width * 3
+    raw = b"".join(
+        b"\x00" + bytes(pixels[row * stride:(row + 1) * stride]) for row in range(height)
+    )
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _render_one(job: tuple) -> bytes:
+    """워커 프로세스에서 프레임 하나를 읽고 그린 뒤 출력 형식으로 인코딩합니다."""
+    frame, width, height, density_field, fmt = job
+    if isinstance(frame, str):
+        frame = read_frame(frame)
+    pixels = rasterize(frame, width, height, density_field)
+    if fmt == "png":
+        return encode_png(pixels, width, height)
+    return bytes(pixels)
+
+
+def render(
+    frames,
+    output: str,
+    fmt: str = "png",
+    width: int = WIDTH,
+    height: int = HEIGHT,
+    density_field: bool = False,
+    workers: int = None,
+    max_pending: int = None,
+) -> int:
+    """
+    프레임들을 프로세스 풀에서 래스터화하여 순서대로 기록합니다.
+
+    동시에 처리 중인 프레임 수를 max_pending (기본값: 워커 수의 두 배) 으로 제한하여
+    긴 실행에서도 메모리 사용량이 일정하게 유지됩니다.
+
+    Args:
+        frames: 프레임 튜플 또는 write_frame 으로 저장한 파일 경로의 iterable
+        output (str): png 이면 출력 디렉터리, raw 이면 rgb24 스트림 파일 경로
+        fmt (str): "png" 또는 "raw"
+        workers (int): 프로세스 수 (기본값: CPU 수)
+        max_pending (int): 동시에 제출할 최대 프레임 수
+
+    Returns:
+        int: 기록한 프레임 수
+    """
+    if fmt not in ("png", "raw"):
+        raise ValueError(f"Unknown output format: {fmt}")
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+
+    if fmt == "png":
+        os.makedirs(output, exist_ok=True)
+        stream = None
+    else:
+        stream = open(output, "wb")
+
+    written = 0
+
+    def write(data: bytes) -> None:
+        nonlocal written
+        if stream is None:
+            with open(os.path.join(output, f"frame_{written:05d}.png"), "wb") as file:
+                file.write(data)
+        else:
+            stream.write(data)
+        written += 1
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for frame in frames:
+                pending.append(
+                    executor.submit(_render_one, (frame, width, height, density_field, fmt))
+                )
+                if len(pending) >= max_pending:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+    finally:
+        if stream is not None:
+            stream.close()
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render simulation frames offline.")
+    parser.add_argument("output", help="output directory (png) or file (raw)")
+    parser.add_argument("--input", help="directory of saved .bin frames")
+    parser.add_argument("--steps", type=int, default=600, help="headless steps when no --input")
+    parser.add_argument("--every", type=int, default=1, help="keep every n-th headless step")
+    parser.add_argument("--format", choices=("png", "raw"), default="png")
+    parser.add_argument("--density", action="store_true", help="draw the smoothed density field")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.input:
+        frames = sorted(
+            os.path.join(args.input, name)
+            for name in os.listdir(args.input)
+            if name.endswith(".bin")
+        )
+    else:
+        frames = simulate(args.steps, args.every)
+    count = render(
+        frames, args.output, args.format, density_field=args.density, workers=args.workers
+    )
+    print(f"{count} frames written to {args.output} ({WIDTH}x{HEIGHT})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Live-state streaming over local TCP.
+
+The solver calls StreamServer.publish() once per frame. The server runs an
+asyncio loop on a background thread and fans the frame out to any number of
+subscribers, each with its own decimation. A subscriber that falls behind only
+ever has the newest frame queued, so the solver never waits on the network.
+
+Message layout (little endian):
+    uint32 message length (excluding this field)
+    4s     magic b"SPHF"
+    uint32 frame number
+    uint32 particle count
+    uint16 length of the comma separated field names, then the names
+    count float32 values per field, fields in name order
+
+A subscriber sends one uint32 decimation (send every n-th frame) after connecting.
+"""
+
+import asyncio
+import socket
+import struct
+import threading
+from array import array
+
+from particle_ import Particle
+from physics import shared_store
+
+
+MAGIC = b"SPHF"
+DEFAULT_FIELDS = ("x_pos", "y_pos", "x_vel", "y_vel", "rho")
+_HEADER = struct.Struct("<4sIIH")
+_LENGTH = struct.Struct("<I")
+
+
+def encode_frame(
+    particles: list[Particle], frame: int, fields: tuple = DEFAULT_FIELDS
+) -> list:
+    """
+    입자 상태를 메시지 조각 목록으로 만듭니다. 필드 값은 array('f') 버퍼 그대로
+    memoryview 로 전달되어 하나의 바이트열로 합치지 않고 전송됩니다.
+
+    Returns:
+        list: 길이 접두사, 헤더, 필드 버퍼들의 memoryview
+    """
+    names = ",".join(fields).encode()
+    store = shared_store(particles)
+    if store is not None:
+        # 저장소의 열을 그대로 변환하고, 리스트 순서가 행 순서와 다를 때만 행별로 모음
+        columns = [getattr(store, field) for field in fields]
+        if store.views != particles:
+            columns = [[column[particle._index] for particle in particles] for column in columns]
+    else:
+        columns = [[getattr(particle, field) for particle in particles] for field in fields]
+    buffers = [memoryview(array("f", column)) for column in columns]
+    header = _HEADER.pack(MAGIC, frame, len(particles), len(names)) + names
+    length = len(header) + sum(buffer.nbytes for buffer in buffers)
+    return [_LENGTH.pack(length), header] + buffers
+
+
+def decode_frame(payload: bytes) -> tuple[int, dict]:
+    """
+    길이 접두사를 뺀 메시지를 해석합니다.
+
+    Returns:
+        tuple: (프레임 번호, {필드 이름: array('f')})
+    """
+    magic, frame, count, names_length = _HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise ValueError("Not an SPH frame")
+    offset = _HEADER.size
+    names = bytes(payload[offset:offset + names_length]).decode().split(",")
+    offset += names_length
+    fields = {}
+    for name in names:
+        values = array("f")
+        values.frombytes(payload[offset:offset + count * values.itemsize])
+        offset += count * values.itemsize
+        fields[name] = values
+    return frame, fields
+
+
+def as_numpy(fields: dict) -> dict:
+    """decode_frame 의 필드를 복사 없이 NumPy float32 배열로 감쌉니다."""
+    import numpy as np
+
+    return {name: np.frombuffer(values, dtype=np.float32) for name, values in fields.items()}
+
+
+class _Subscriber:
+    """구독자 하나의 상태. 대기열에는 가장 최근 프레임 하나만 남습니다."""
+
+    def __init__(self, writer: asyncio.StreamWriter, decimation: int):
+        self.writer = writer
+        self.decimation = max(1, decimation)
+        self.pending = asyncio.Queue(maxsize=1)
+        self.sent = 0
+        self.dropped = 0
+
+    def offer(self, frame: int, message: list) -> None:
+        if frame % self.decimation != 0:
+            return
+        if self.pending.full():
+            self.pending.get_nowait()
+            self.dropped += 1
+        self.pending.put_nowait(message)
+
+
+class StreamServer:
+    """
+    시뮬레이션 상태를 로컬 TCP 구독자들에게 보내는 서버.
+
+    Args:
+        host (str): 바인드 주소
+        port (int): 포트, 0 이면 임의 포트 (start() 이후 self.port)
+        fields (tuple): 보낼 Particle 속성 이름
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, fields: tuple = DEFAULT_FIELDS):
+        self.host = host
+        self.port = port
+        self.fields = tuple(fields)
+        self.subscribers = []
+        # 연결마다 하나인 _handle 태스크 (decimation 을 아직 보내지 않은 연결 포함)
+        self._tasks = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def start(self) -> "StreamServer":
+        """백그라운드 스레드에서 이벤트 루프와 서버를 시작합니다."""
+        ready = threading.Event()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="sph-stream", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        """서버를 닫고 모든 구독자 연결을 끊습니다."""
+        if self._loop is None:
+            return
+
+        async def shutdown() -> None:
+            self._server.close()
+            tasks = list(self._tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    def publish(self, particles: list[Particle], frame: int) -> None:
+        """
+        프레임을 모든 구독자에게 보냅니다. 솔버 스레드에서 호출하며 기다리지 않습니다.
+        구독자가 없으면 인코딩도 하지 않습니다.
+        """
+        if self._loop is None or not self.subscribers:
+            return
+        message = encode_frame(particles, frame, self.fields)
+        self._loop.call_soon_threadsafe(self._broadcast, frame, message)
+
+    def _broadcast(self, frame: int, message: list) -> None:
+        for subscriber in self.subscribers:
+            subscriber.offer(frame, message)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        subscriber = None
+        try:
+            (decimation,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+            subscriber = _Subscriber(writer, decimation)
+            self.subscribers.append(subscriber)
+            while True:
+                message = await subscriber.pending.get()
+                writer.writelines(message)
+                await writer.drain()
+                subscriber.sent += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # 구독자가 연결을 끊음. 취소 (stop) 는 그대로 전파하고 정리는 finally 에서 함
+            pass
+        finally:
+            if subscriber is not None:
+                self.subscribers.remove(subscriber)
+            self._tasks.discard(task)
+            writer.close()
+
+
+class StreamClient:
+    """
+    StreamServer 구독 클라이언트 (블로킹 소켓).
+
+    Args:
+        host (str): 서버 주소
+        port (int): 서버 포트
+        decimation (int): n 번째 프레임마다 받기
+    """
+
+    def __init__(self, host: str, port: int, decimation: int = 1, timeout: float = None):
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._socket.sendall(_LENGTH.pack(decimation))
+
+    def _read_exactly(self, size: int) -> bytearray:
+        data = bytearray(size)
+        view = memoryview(data)
+        received = 0
+        while received < size:
+            count = self._socket.recv_into(view[received:])
+            if count == 0:
+                raise ConnectionError("Stream closed")
+            received += count
+        return data
+
+    def receive(self) -> tuple[int, dict]:
+        """
+        다음 프레임을 받습니다.
+
+        Returns:
+            tuple: (프레임 번호, {필드 이름: array('f')}), as_numpy 로 NumPy 배열로 변환 가능
+        """
+        (length,) = _LENGTH.unpack(self._read_exactly(_LENGTH.size))
+        return decode_frame(self._read_exactly(length))
+
+    def close(self) -> None:
+        self._socket.close()
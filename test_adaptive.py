@@ -0,0 +1,111 @@
+import unittest
+from config import Config
+from physics import (
+    start, update, calculate_density, create_grid, get_parameters, set_parameters, particle_rows,
+)
+from particle_ import Particle, ParticleStore
+from adaptive import adapt_resolution
+
+# Get config values
+(
+    N_cfg, SIM_W_cfg, BOTTOM_cfg, DAM_cfg, DAM_BREAK_cfg, G_cfg, SPACING_cfg, K_cfg, K_NEAR_cfg,
+    REST_DENSITY_cfg, R_cfg, SIGMA_cfg, MAX_VEL_cfg, WALL_DAMP_cfg, VEL_DAMP_cfg, GRID_CELL_SIZE_cfg
+) = Config().return_config()
+
+
+def totals(particles):
+    store, rows = particle_rows(particles)
+    m = [store.mass[i] for i in rows]
+    mass = sum(m)
+    return (
+        mass,
+        sum(mi * store.x_pos[i] for mi, i in zip(m, rows)) / mass,
+        sum(mi * store.y_pos[i] for mi, i in zip(m, rows)) / mass,
+        sum(mi * store.x_vel[i] for mi, i in zip(m, rows)),
+        sum(mi * store.y_vel[i] for mi, i in zip(m, rows)),
+    )
+
+
+class TestAdaptResolution(unittest.TestCase):
+
+    def setUp(self):
+        # A dense block at rest: every interior particle is calm
+        self.particles = start(-1.0, 1.0, 0.5, 0.03, 200)
+        for index, p in enumerate(self.particles):
+            p.x_vel = 0.001 * (index % 3 - 1)
+            p.y_vel = 0.0005 * (index % 5 - 2)
+
+    def test_merge_conserves_mass_and_momentum(self):
+        before = totals(self.particles)
+        merged = adapt_resolution(self.particles)
+        self.assertLess(len(merged), len(self.particles) * 0.75)
+        self.assertLessEqual(max(p.mass for p in merged), 2.0)
+        for expected, actual in zip(before, totals(merged)):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_split_conserves_mass_and_momentum(self):
+        store = ParticleStore()
+        heavy = store.add(0.0, 1.0)
+        heavy.mass = 2.0
+        heavy.x_vel = 0.3
+        light = store.add(1.0, 1.0)
+        before = totals([heavy, light])
+
+        result = adapt_resolution([heavy, light])
+        self.assertEqual(sorted(p.mass for p in result), [1.0, 1.0, 1.0])
+        for expected, actual in zip(before, totals(result)):
+            self.assertAlmostEqual(actual, expected)
+        # Halves sit side by side across the direction of motion
+        halves = [p for p in result if p.x_pos < 0.5]
+        self.assertEqual([p.x_vel for p in halves], [0.3, 0.3])
+        self.assertAlmostEqual(halves[0].x_pos, halves[1].x_pos)
+
+    def test_merged_particles_keep_simulating(self):
+        particles = adapt_resolution(self.particles)
+        mass = sum(p.mass for p in particles)
+        for _ in range(5):
+            update(particles, False)
+        store = particles[0]._store
+        self.assertAlmostEqual(sum(store.mass), mass)
+        self.assertTrue(all(abs(x) < 4 and abs(y) < 4 for x, y in zip(store.x_pos, store.y_pos)))
+
+    def test_merged_particles_keep_their_density(self):
+        merged = adapt_resolution(self.particles)
+        heavy = [p for p in merged if p.mass > 1.0]
+        self.assertTrue(heavy)
+        # rho of a merged particle starts as the mass weighted mean of its parts'
+        parts = sum(p.rho for p in heavy) / len(heavy)
+        grid = create_grid(merged, R_cfg)
+        calculate_density(merged, grid, R_cfg)
+        # Without the internal pair's kernel the merged particles lose ~15%
+        self.assertAlmostEqual(sum(p.rho for p in heavy) / len(heavy) / parts, 1.0, delta=0.05)
+
+    def test_leaves_input_particles_unchanged(self):
+        particles = update(self.particles, False)
+        store = particles[0]._store
+        before = {
+            name: list(getattr(store, name))
+            for name in ("rho", "rho_near", "pair_start", "pair_rows", "pair_kernels")
+        }
+        adapt_resolution(particles)
+        for name, values in before.items():
+            self.assertEqual(list(getattr(store, name)), values, name)
+
+    def test_thresholds_follow_rest_density(self):
+        previous = set_parameters(REST_DENSITY=get_parameters()["REST_DENSITY"] * 10)
+        try:
+            merged = adapt_resolution(self.particles)
+        finally:
+            set_parameters(**previous)
+        self.assertEqual(len(merged), len(self.particles))
+        self.assertLess(len(adapt_resolution(self.particles)), len(self.particles))
+
+    def test_requires_one_store(self):
+        with self.assertRaises(ValueError):
+            adapt_resolution([Particle(0.0, 0.0), ParticleStore().add(0.1, 0.0)])
+        with self.assertRaises(ValueError):
+            adapt_resolution(self.particles, merge_speed=0.1, split_speed=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
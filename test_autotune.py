@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import autotune
+from config import Config
+from physics import update
+
+# Get config values
+(
+    N_cfg, SIM_W_cfg, BOTTOM_cfg, DAM_cfg, DAM_BREAK_cfg, G_cfg, SPACING_cfg, K_cfg, K_NEAR_cfg,
+    REST_DENSITY_cfg, R_cfg, SIGMA_cfg, MAX_VEL_cfg, WALL_DAMP_cfg, VEL_DAMP_cfg, GRID_CELL_SIZE_cfg
+) = Config().return_config()
+
+
+class TestAutotune(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.original_path = autotune.CACHE_PATH
+        autotune.CACHE_PATH = os.path.join(self.directory.name, "autotune.json")
+
+    def tearDown(self):
+        autotune.CACHE_PATH = self.original_path
+        self.directory.cleanup()
+
+    def test_signatures(self):
+        self.assertEqual(autotune.machine_signature(), autotune.machine_signature())
+        self.assertEqual(autotune.scene_signature(100), autotune.scene_signature(100))
+        self.assertNotEqual(autotune.scene_signature(100), autotune.scene_signature(200))
+
+    def test_autotune_caches_valid_settings(self):
+        self.assertIsNone(autotune.load_tuned(40))
+        best = autotune.autotune(steps=2, count=40, verbose=False)
+
+        self.assertEqual(set(best), set(autotune.DEFAULT_SETTINGS))
+        self.assertGreaterEqual(best["grid_cell_size"], R_cfg + best["skin"] / 2)
+        self.assertEqual(autotune.load_tuned(40), best)
+        self.assertIsNone(autotune.load_tuned(41))
+
+        # Every step of the chosen settings uses the default neighbours
+        _, error = autotune.measure(best, 2, 40)
+        self.assertLessEqual(error, autotune.TOLERANCE)
+
+    def test_step_error_accepts_exact_candidates(self):
+        for settings in (
+            {"grid_cell_size": R_cfg * 1.5, "skin": SPACING_cfg * 0.5, "reorder_every": 0},
+            {"grid_cell_size": R_cfg, "skin": 0.0, "reorder_every": 3},
+            {"grid_cell_size": R_cfg, "skin": 0.0, "reorder_every": 3, "backend": "objects"},
+        ):
+            _, error = autotune.measure(settings, 30, 300, repeats=1)
+            self.assertLessEqual(error, autotune.TOLERANCE)
+
+    def test_measure_keeps_fastest_repeat(self):
+        times = iter([0.0, 5.0, 0.0, 2.0, 0.0, 3.0])
+        with mock.patch.object(autotune.time, "perf_counter", lambda: next(times)):
+            seconds, error = autotune.measure(autotune.DEFAULT_SETTINGS, 1, 20, repeats=3)
+        self.assertEqual(seconds, 2.0)
+        self.assertLessEqual(error, autotune.TOLERANCE)
+
+    def test_autotune_needs_a_margin_to_switch(self):
+        # Only the objects backend is faster, by less than MIN_GAIN, then by more
+        for gain, expected in ((autotune.MIN_GAIN / 2, "array"), (autotune.MIN_GAIN * 2, "objects")):
+            def fake_measure(settings, steps, count, gain=gain):
+                return (1.0 - gain if settings["backend"] == "objects" else 1.0), 0.0
+
+            with mock.patch.object(autotune, "measure", fake_measure):
+                best = autotune.autotune(steps=1, count=40, verbose=False)
+            self.assertEqual(best, dict(autotune.DEFAULT_SETTINGS, backend=expected))
+
+    def test_step_error_rejects_missed_neighbours(self):
+        particles = update(autotune.scene(300), False)
+        self.assertLessEqual(autotune.step_error(particles), autotune.TOLERANCE)
+
+        # A stale grid that lost a neighbour at half the kernel radius
+        particles[0].rho -= 0.25
+        self.assertGreater(autotune.step_error(particles), autotune.TOLERANCE)
+
+    def test_load_tuned_drops_unknown_settings(self):
+        autotune.save_tuned(dict(autotune.DEFAULT_SETTINGS, viscosity_mode="jacobi", workers=4), 40)
+        self.assertEqual(autotune.load_tuned(40), autotune.DEFAULT_SETTINGS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from unittest import mock
+import array_physics
+import conformance
+from physics import update
+
+
+class TestConformance(unittest.TestCase):
+
+    def setUp(self):
+        self.original_backends = dict(conformance.BACKENDS)
+
+    def tearDown(self):
+        conformance.BACKENDS.clear()
+        conformance.BACKENDS.update(self.original_backends)
+
+    def test_backends_match_their_baselines(self):
+        # Long enough for a different sweep order to move the state well away from the reference
+        rows = conformance.compare(steps=30, count=120)
+        self.assertEqual(len(rows), len(conformance.scenes()) * len(conformance.BACKENDS))
+        failed = [(row["scene"], row["backend"]) for row in rows if not row["passed"]]
+        self.assertEqual(failed, [])
+        for row in rows:
+            if row["backend"] in ("reference", "array", "array-jacobi"):
+                # The array backends run array_physics and the baselines run the separate
+                # per-object code in physics.py, so exact equality checks both implementations
+                self.assertEqual(row["errors"]["x_pos"], (0.0, 0.0))
+                self.assertEqual(row["errors"]["y_vel"], (0.0, 0.0))
+                self.assertEqual(row["momentum_error"], 0.0)
+            if row["backend"] in ("array-reorder", "array-skin"):
+                self.assertLessEqual(row["neighbour_error"], conformance.TOLERANCE)
+            if row["backend"] == "reference":
+                self.assertEqual(row["speedup"], 1.0)
+
+        table = conformance.format_table(rows)
+        self.assertIn("speedup", table.splitlines()[0])
+        self.assertEqual(len(table.splitlines()), len(rows) + 1)
+
+    def test_reference_does_not_use_array_physics(self):
+        positions = conformance.scenes(40)["block"]()
+        for name in ("reference", "jacobi"):
+            particles, step = conformance.BACKENDS[name]["build"](positions)
+            with mock.patch.object(array_physics, "calculate_density", side_effect=AssertionError), \
+                    mock.patch.object(array_physics, "calculate_viscosity", side_effect=AssertionError):
+                step()
+            self.assertTrue(all(particle.rho > 0.0 for particle in particles))
+
+    def test_registered_backend_is_checked(self):
+        def drifting(positions):
+            particles, step = conformance.BACKENDS["array"]["build"](positions)
+
+            def drifting_step():
+                update(particles, False)
+                for particle in particles:
+                    particle.x_pos += 0.01
+
+            return particles, drifting_step
+
+        conformance.register_backend("drifting", drifting, tolerance=1e-3, baseline="array")
+        rows = conformance.compare(steps=2, count=40, backends=["drifting"])
+        self.assertEqual({row["backend"] for row in rows}, {"reference", "array", "drifting"})
+        for row in rows:
+            self.assertEqual(row["passed"], row["backend"] != "drifting")
+        drift = [row for row in rows if row["backend"] == "drifting"][0]
+        self.assertAlmostEqual(drift["errors"]["x_pos"][0], 0.02, places=3)
+
+    def test_unstable_backend_fails_without_tolerance(self):
+        def exploding(positions):
+            particles, step = conformance.BACKENDS["array"]["build"](positions)
+
+            def exploding_step():
+                update(particles, False)
+                for particle in particles:
+                    particle.x_vel = conformance.MAX_VEL if particle.x_pos > 0 else -conformance.MAX_VEL
+                    particle.x_pos += particle.x_vel
+
+            return particles, exploding_step
+
+        conformance.register_backend("exploding", exploding, baseline="array")
+        rows = conformance.compare(steps=3, count=40, backends=["exploding"])
+        for row in rows:
+            self.assertEqual(row["passed"], row["backend"] != "exploding")
+        explode = [row for row in rows if row["backend"] == "exploding"][0]
+        self.assertEqual(explode["unstable_step"], 1)
+        self.assertIn("FAIL", conformance.format_table(rows))
+
+    def test_same_neighbours_catches_wrong_density(self):
+        # Stands in for a backend that misses or adds neighbour pairs
+        def lossy(positions):
+            particles, _ = conformance.BACKENDS["array"]["build"](positions)
+
+            def lossy_step():
+                update(particles, False)
+                particles[0].rho *= 0.99
+
+            return particles, lossy_step
+
+        conformance.register_backend("lossy", lossy, same_neighbours=True)
+        rows = conformance.compare(steps=2, count=40, backends=["lossy"])
+        lossy_rows = [row for row in rows if row["backend"] == "lossy"]
+        for row in lossy_rows:
+            self.assertGreater(row["neighbour_error"], conformance.TOLERANCE)
+            self.assertFalse(row["passed"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import zlib
+from particle_ import FIELDS
+from physics import start, update, set_parameters, get_parameters
+from history import HistoryBuffer, _snapshot
+
+
+def state(particles):
+    return [(p.x_pos, p.y_pos, p.x_vel, p.y_vel, p.x_force, p.y_force, p.visual_x_pos) for p in particles]
+
+
+class TestHistoryBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.particles = start(-1.0, 1.0, 0.5, 0.05, 60)
+        self.history = HistoryBuffer(keyframe_every=8)
+        self.states = []
+        for frame in range(30):
+            update(self.particles, False)
+            self.history.record(self.particles, frame)
+            self.states.append(state(self.particles))
+
+    def test_restore_any_stored_frame(self):
+        self.assertEqual((self.history.first, self.history.last), (0, 29))
+        self.assertEqual(len(self.history), 30)
+        for frame in (0, 7, 8, 13, 29):
+            self.assertEqual(state(self.history.restore(frame)), self.states[frame])
+        with self.assertRaises(KeyError):
+            self.history.restore(30)
+
+    def test_resume_from_restored_frame(self):
+        particles = self.history.restore(12)
+        for _ in range(5):
+            update(particles, False)
+        self.assertEqual(state(particles), self.states[17])
+
+    def test_resume_with_changed_parameters_overwrites_future(self):
+        particles = self.history.restore(10)
+        previous = set_parameters(SIGMA=get_parameters()["SIGMA"] * 0.5)
+        try:
+            for frame in range(11, 15):
+                update(particles, False)
+                self.history.record(particles, frame)
+        finally:
+            set_parameters(**previous)
+        self.assertEqual(self.history.last, 14)
+        self.assertEqual(state(self.history.restore(14)), state(particles))
+        self.assertNotEqual(state(particles), self.states[14])
+        self.assertEqual(state(self.history.restore(10)), self.states[10])
+
+    def test_memory_cap_evicts_oldest_keyframe_groups(self):
+        history = HistoryBuffer(max_bytes=self.history.nbytes // 2, keyframe_every=8)
+        particles = start(-1.0, 1.0, 0.5, 0.05, 60)
+        for frame in range(30):
+            update(particles, False)
+            history.record(particles, frame)
+        self.assertLessEqual(history.nbytes, history.max_bytes)
+        self.assertEqual(history.last, 29)
+        self.assertGreater(history.first, 0)
+        self.assertEqual(history.first % 8, 0)
+        self.assertEqual(state(history.restore(history.first)), self.states[history.first])
+
+    def test_memory_cap_is_a_hard_limit(self):
+        # Less than one keyframe group: the current group loses its oldest frames
+        history = HistoryBuffer(max_bytes=self.history.nbytes // 10, keyframe_every=30)
+        particles = start(-1.0, 1.0, 0.5, 0.05, 60)
+        for frame in range(30):
+            update(particles, False)
+            history.record(particles, frame)
+            self.assertLessEqual(history.nbytes, history.max_bytes)
+        self.assertEqual(history.last, 29)
+        self.assertGreater(history.first, 0)
+        for frame in (history.first, 29):
+            self.assertEqual(state(history.restore(frame)), self.states[frame])
+
+        # A single frame larger than the cap is not kept
+        tiny = HistoryBuffer(max_bytes=16)
+        tiny.record(particles, 0)
+        self.assertEqual((len(tiny), tiny.nbytes, tiny.last), (0, 0, None))
+        tiny.record(particles, 1)
+        self.assertEqual(len(tiny), 0)
+
+    def test_deltas_are_compressed(self):
+        # Shuffled XOR deltas beat compressing every raw frame on its own
+        particles = start(-1.0, 1.0, 0.5, 0.05, 60)
+        plain = 0
+        for frame in range(30):
+            update(particles, False)
+            plain += len(zlib.compress(_snapshot(particles), 1))
+        self.assertLess(self.history.nbytes, plain)
+
+        # An unchanged state costs next to nothing after its keyframe
+        history = HistoryBuffer(keyframe_every=8)
+        for frame in range(8):
+            history.record(self.particles, frame)
+        raw = len(self.particles) * len(FIELDS) * 8
+        deltas = history.nbytes - len(history._groups[0][2][0])
+        self.assertLess(deltas, 7 * raw // 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from math import sqrt
+from particle_ import Particle
+from kernel import pair_kernel, kernel_terms, neighbor_kernels
+from physics import calculate_viscosity
+from config import Config
+
+# Get config values
+(
+    N_cfg, SIM_W_cfg, BOTTOM_cfg, DAM_cfg, DAM_BREAK_cfg, G_cfg, SPACING_cfg, K_cfg, K_NEAR_cfg,
+    REST_DENSITY_cfg, R_cfg, SIGMA_cfg, MAX_VEL_cfg, WALL_DAMP_cfg, VEL_DAMP_cfg, GRID_CELL_SIZE_cfg
+) = Config().return_config()
+
+
+class TestKernel(unittest.TestCase):
+
+    def test_pair_kernel_matches_powers(self):
+        dx, dy = R_cfg * 0.3, -R_cfg * 0.4
+        kernel = pair_kernel(dx, dy)
+        distance = sqrt(dx**2 + dy**2)
+        q = 1 - distance / R_cfg
+        self.assertEqual(kernel[:2], (dx, dy))
+        self.assertAlmostEqual(kernel[2], distance)
+        self.assertAlmostEqual(kernel[3], q)
+        self.assertAlmostEqual(kernel[4], q**2)
+        self.assertAlmostEqual(kernel[5], q**3)
+
+    def test_pair_kernel_rejects_outside_radius(self):
+        self.assertIsNone(pair_kernel(R_cfg, 0.0))
+        self.assertIsNone(pair_kernel(R_cfg * 0.8, R_cfg * 0.8))
+        self.assertIsNotNone(pair_kernel(R_cfg * 0.99, 0.0))
+
+    def test_neighbor_kernels_fallback_and_cache(self):
+        p1 = Particle(0.0, 0.0)
+        p2 = Particle(R_cfg * 0.5, 0.0)
+        p1.neighbors = [p2]
+        kernels = neighbor_kernels(p1)
+        self.assertEqual(kernels, [kernel_terms(R_cfg * 0.5, 0.0, (R_cfg * 0.5) ** 2)])
+        self.assertIs(neighbor_kernels(p1), kernels)
+
+    def test_reassigned_neighbors_drop_cached_kernels(self):
+        p1 = Particle(0.0, 0.0)
+        p2 = Particle(R_cfg * 0.5, 0.0)
+        p3 = Particle(0.0, R_cfg * 0.5)
+        p1.neighbors = [p2]
+        calculate_viscosity([p1])
+        self.assertEqual(p1.neighbor_kernels[0][:2], (R_cfg * 0.5, 0.0))
+
+        # p1 now moves towards p3, a different single neighbour
+        p1.neighbors = [p3]
+        p1.y_vel = 0.2
+        calculate_viscosity([p1])
+        self.assertEqual(neighbor_kernels(p1)[0][:2], (0.0, R_cfg * 0.5))
+        self.assertLess(p1.y_vel, 0.2)
+        self.assertGreater(p3.y_vel, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
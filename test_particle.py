@@ -1,6 +1,6 @@
 import unittest
 from math import sqrt
-from particle_ import Particle # Assuming particle_.py is in the same directory or PYTHONPATH
+from particle_ import Particle, ParticleStore # Assuming particle_.py is in the same directory or PYTHONPATH
 from config import Config
 
 # Get config values for tests
@@ -156,6 +156,83 @@ class TestParticle(unittest.TestCase):
         
         self.assertAlmostEqual(p.press, expected_press)
         self.assertAlmostEqual(p.press_near, expected_press_near)
+    def test_particle_is_view_onto_store(self):
+        store = ParticleStore()
+        p1 = store.add(1.0, 2.0)
+        p2 = store.add(3.0, 4.0)
+        self.assertFalse(hasattr(p1, "__dict__"))
+        self.assertEqual(len(store), 2)
+        self.assertEqual(list(store.x_pos), [1.0, 3.0])
+        self.assertAlmostEqual(store.y_force[1], -G_cfg)
+
+        p2.x_vel = 0.5
+        self.assertEqual(store.x_vel[1], 0.5)
+        store.rho[0] = 2.0
+        self.assertEqual(p1.rho, 2.0)
+
+        with self.assertRaises(AttributeError):
+            p1.unknown_attribute = 1.0
+
+    def test_neighbors_keep_assigned_list(self):
+        store = ParticleStore()
+        p1 = store.add(0.0, 0.0)
+        p2 = store.add(0.05, 0.0)
+        neighbors = [p2]
+        p1.neighbors = neighbors
+        self.assertIs(p1.neighbors, neighbors)
+        p1.update_state(dam=False)
+        # A list held by the caller is left alone; the particle gets a fresh one
+        self.assertEqual(neighbors, [p2])
+        self.assertEqual(p1.neighbors, [])
+        # Never-used neighbour lists are not allocated
+        self.assertIsNone(store.neighbors[1])
+        self.assertEqual(p2.neighbors, [])
+
+    def test_standalone_particles_own_their_store(self):
+        p1 = Particle(0.0, 0.0)
+        p2 = Particle(1.0, 0.0)
+        # Nothing accumulates in a shared store; each store goes away with its particle
+        self.assertIsNot(p1._store, p2._store)
+        self.assertEqual(len(p1._store), 1)
+        self.assertEqual(len(p2._store), 1)
+
+    def test_store_reorder_keeps_views(self):
+        store = ParticleStore()
+        particles = [store.add(float(i), 0.0) for i in range(4)]
+        particles[2].x_vel = 0.25
+        store.reorder([3, 2, 1, 0])
+        self.assertEqual(list(store.x_pos), [3.0, 2.0, 1.0, 0.0])
+        self.assertEqual(store.views, particles[::-1])
+        self.assertEqual(particles[2].x_pos, 2.0)
+        self.assertEqual(particles[2].x_vel, 0.25)
+
+    def test_store_update_states_matches_update_state(self):
+        store = ParticleStore()
+        positions = [(-SIM_W_cfg - 0.1, 0.5), (SIM_W_cfg + 0.1, 0.5), (DAM_cfg + 0.1, 0.5), (0.0, BOTTOM_cfg - 0.1), (0.3, 0.4)]
+        stored = [store.add(x, y) for x, y in positions]
+        single = [Particle(x, y) for x, y in positions]
+        for i, (a, b) in enumerate(zip(stored, single)):
+            for p in (a, b):
+                p.x_vel = MAX_VEL_cfg * (0.9 if i == 4 else 0.1)
+                p.y_vel = MAX_VEL_cfg * 0.8
+                p.x_force = 0.01 * i
+                p.rho = 1.0
+                p.rho_near = 0.5
+        store.update_states(dam=True)
+        for p in single:
+            p.update_state(dam=True)
+        for a, b in zip(stored, single):
+            for field in ("x_pos", "y_pos", "previous_x_pos", "visual_x_pos", "visual_y_pos", "x_vel", "y_vel", "x_force", "y_force", "rho", "rho_near"):
+                self.assertEqual(getattr(a, field), getattr(b, field), field)
+
+    def test_update_state_keeps_last_density(self):
+        p = Particle(0.0, 0.5)
+        p.rho = 3.0
+        p.rho_near = 1.5
+        p.update_state(dam=False)
+        self.assertEqual(p.rho, 3.0)
+        self.assertEqual(p.rho_near, 1.5)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,10 @@
 import unittest
 from math import sqrt
 from particle_ import Particle # Assuming particle_.py is in the same directory or PYTHONPATH
-from physics import start, calculate_density, create_pressure, calculate_viscosity, create_grid
+from physics import (
+    start, calculate_density, create_pressure, calculate_viscosity, create_grid, update,
+    get_parameters, set_parameters,
+)
 from config import Config
 
 # Get config values
@@ -231,6 +234,226 @@ class TestPhysicsFunctions(unittest.TestCase):
         self.assertAlmostEqual(p1.x_vel, initial_p1_x_vel)
         self.assertAlmostEqual(p2.x_vel, initial_p2_x_vel)
 
+    def test_calculate_viscosity_jacobi_permutation_independent(self):
+        # A small block of particles with a deterministic pseudo-random velocity field
+        def build():
+            particles = start(0.0, 1.4, 0.0, SPACING_cfg * 0.6, 24)
+            for i, p in enumerate(particles):
+                p.x_vel = ((i * 37) % 11 - 5) * 0.01
+                p.y_vel = ((i * 53) % 7 - 3) * 0.01
+            return particles
+
+        reference = build()
+        grid = create_grid(reference, GRID_CELL_SIZE_cfg)
+        calculate_density(reference, grid, GRID_CELL_SIZE_cfg)
+        calculate_viscosity(reference, mode="jacobi")
+        expected = [(p.x_vel, p.y_vel) for p in reference]
+        self.assertTrue(any(p.neighbors for p in reference))
+
+        for shift in (7, 13, 5):
+            particles = build()
+            order = [(i * shift) % len(particles) for i in range(len(particles))]
+            permuted = [particles[i] for i in order]
+            grid = create_grid(permuted, GRID_CELL_SIZE_cfg)
+            calculate_density(permuted, grid, GRID_CELL_SIZE_cfg)
+            calculate_viscosity(permuted, mode="jacobi")
+            for i, p in enumerate(particles):
+                self.assertAlmostEqual(p.x_vel, expected[i][0], places=12)
+                self.assertAlmostEqual(p.y_vel, expected[i][1], places=12)
+
+    def test_jacobi_damping_comparable_to_gauss_seidel(self):
+        # Fraction of the velocity variance one viscosity pass removes, on a block with
+        # about 8 neighbours per particle and on the dense main.py block (30+)
+        def removed(space, mode):
+            particles = start(0.0, 2.2, 0.0, space, 400)
+            for i, p in enumerate(particles):
+                p.x_vel = ((i * 37) % 11 - 5) * 0.01
+                p.y_vel = ((i * 53) % 7 - 3) * 0.01
+            grid = create_grid(particles, GRID_CELL_SIZE_cfg)
+            calculate_density(particles, grid, GRID_CELL_SIZE_cfg)
+
+            def variance():
+                mean_x = sum(p.x_vel for p in particles) / len(particles)
+                mean_y = sum(p.y_vel for p in particles) / len(particles)
+                return sum((p.x_vel - mean_x) ** 2 + (p.y_vel - mean_y) ** 2 for p in particles)
+
+            before = variance()
+            calculate_viscosity(particles, mode=mode)
+            return 1 - variance() / before
+
+        for space in (0.06, 0.03):
+            gauss_seidel = removed(space, "gauss_seidel")
+            jacobi = removed(space, "jacobi")
+            self.assertGreater(jacobi, 0.75 * gauss_seidel, space)
+            self.assertLess(jacobi, 4 / 3 * gauss_seidel, space)
+
+    def test_calculate_viscosity_jacobi_pair(self):
+        def pair(distance):
+            p1 = Particle(0.0, 0.0)
+            p2 = Particle(distance, 0.0)
+            p1.neighbors = [p2]
+            p2.neighbors = [p1]
+            p1.x_vel = 0.2
+            p2.x_vel = -0.2
+            calculate_viscosity([p1, p2], mode="jacobi")
+            return p1, p2
+
+        # Both pair entries reduce the approach speed by (1 - q) * SIGMA times the speed
+        # after viscosity, so the implicit solution is r / (1 + 2 * (1 - q) * SIGMA);
+        # the Jacobi sweeps get within a few thousandths of it
+        for q in (0.9, 0.5, 0.1):
+            p1, p2 = pair(R_cfg * q)
+            reduction = (1 - q) * SIGMA_cfg
+            expected = 0.2 - reduction * 0.4 / (1 + 2 * reduction)
+            self.assertAlmostEqual(p1.x_vel, expected, delta=0.002)
+            self.assertAlmostEqual(p1.x_vel + p2.x_vel, 0.0)
+            # Even a close pair only slows down, it never bounces back
+            self.assertGreater(p1.x_vel, 0.0)
+
+    def test_calculate_viscosity_jacobi_stays_stable(self):
+        # The dense main.py block; explicit Jacobi impulses sent every particle to MAX_VEL
+        # within 10 steps
+        particles = start(-3, 3, 1, 0.03, 600)
+        for _ in range(60):
+            update(particles, False, viscosity_mode="jacobi")
+        for p in particles:
+            self.assertLess(sqrt(p.x_vel ** 2 + p.y_vel ** 2), 0.5 * MAX_VEL_cfg)
+            self.assertLess(abs(p.x_pos), SIM_W_cfg + 0.5)
+            self.assertLess(p.y_pos, 2 * SIM_W_cfg)
+
+    def test_mass_weighted_density_and_viscosity(self):
+        p1 = Particle(0.0, 0.0)
+        p2 = Particle(R_cfg * 0.5, 0.0)
+        p2.mass = 2.0
+        particles = [p1, p2]
+        grid = create_grid(particles, GRID_CELL_SIZE_cfg)
+        calculate_density(particles, grid, GRID_CELL_SIZE_cfg)
+        # Each side sees the other's mass times the kernel weight
+        self.assertAlmostEqual(p1.rho, 2.0 * 0.25)
+        self.assertAlmostEqual(p2.rho, 0.25)
+
+        p1.x_vel = 0.2
+        p2.x_vel = -0.2
+        for mode in ("gauss_seidel", "jacobi"):
+            momentum = p1.mass * p1.x_vel + p2.mass * p2.x_vel
+            calculate_viscosity(particles, mode=mode)
+            self.assertAlmostEqual(p1.mass * p1.x_vel + p2.mass * p2.x_vel, momentum)
+
+    def test_merged_particle_viscosity_acts_for_its_parts(self):
+        def pair(distance, mass):
+            p1 = Particle(0.0, 0.0)
+            p2 = Particle(distance, 0.0)
+            p2.mass = mass
+            p1.neighbors = [p2]
+            p2.neighbors = []
+            p1.x_vel = 0.2
+            p2.x_vel = -0.2
+            calculate_viscosity([p1, p2])
+            return p1.x_vel - 0.2, p2.x_vel + 0.2
+
+        # A distant pair: the unit particle feels both halves of the merged one
+        unit_1, unit_2 = pair(R_cfg * 0.9, 1.0)
+        merged_1, merged_2 = pair(R_cfg * 0.9, 2.0)
+        self.assertAlmostEqual(merged_1, 2 * unit_1)
+        self.assertAlmostEqual(merged_2, unit_2)
+
+        # A close pair reverses its approach no more than a unit pair does
+        unit_1, unit_2 = pair(R_cfg * 0.1, 1.0)
+        merged_1, merged_2 = pair(R_cfg * 0.1, 2.0)
+        self.assertAlmostEqual(merged_2 - merged_1, unit_2 - unit_1)
+        self.assertAlmostEqual(merged_1 + 2.0 * merged_2, 0.0)
+
+    def test_mass_weighted_pressure_conserves_momentum(self):
+        particles = [Particle(0.0, 0.0), Particle(R_cfg * 0.4, R_cfg * 0.3), Particle(-R_cfg * 0.5, 0.0)]
+        particles[1].mass = 2.0
+        particles[2].mass = 1.5
+        for p in particles:
+            p.y_force = 0.0
+        grid = create_grid(particles, GRID_CELL_SIZE_cfg)
+        calculate_density(particles, grid, GRID_CELL_SIZE_cfg)
+        for p in particles:
+            p.calculate_pressure()
+        create_pressure(particles)
+        # x_force / y_force are accelerations, so mass * force sums to zero
+        self.assertAlmostEqual(sum(p.mass * p.x_force for p in particles), 0.0)
+        self.assertAlmostEqual(sum(p.mass * p.y_force for p in particles), 0.0)
+
+    def test_update_grid_reuse_with_skin(self):
+        reference = start(-1.0, 1.0, 0.5, 0.06, 60)
+        particles = start(-1.0, 1.0, 0.5, 0.06, 60)
+        cache = {}
+        for _ in range(4):
+            update(reference, False, grid_cell_size=R_cfg + 0.02)
+            update(particles, False, grid_cell_size=R_cfg + 0.02, skin=0.04, cache=cache)
+        self.assertIn("grid", cache)
+        for expected, actual in zip(reference, particles):
+            self.assertAlmostEqual(actual.x_pos, expected.x_pos, places=6)
+            self.assertAlmostEqual(actual.y_pos, expected.y_pos, places=6)
+
+        # The 3x3 cell search would miss neighbours with a cell smaller than R + skin / 2
+        with self.assertRaises(ValueError):
+            update(particles, False, grid_cell_size=R_cfg, skin=0.04)
+
+    def test_update_reorder_keeps_particles(self):
+        particles = start(-1.0, 1.0, 0.5, 0.06, 60)
+        initial = set(map(id, particles))
+        cache = {}
+        for _ in range(3):
+            update(particles, False, reorder_every=2, cache=cache)
+        self.assertEqual(set(map(id, particles)), initial)
+        self.assertEqual(cache["step"], 3)
+
+    def test_update_store_path_matches_particle_path(self):
+        # start() particles share a store and take the array path; standalone particles
+        # each own a store and take the per-object reference path
+        skin = {"grid_cell_size": R_cfg + 0.02, "skin": 0.04}
+        for settings in ({}, {"viscosity_mode": "jacobi"}, {"reorder_every": 2}, skin):
+            stored = start(-1.0, 1.0, 0.5, 0.05, 80)
+            single = [Particle(p.x_pos, p.y_pos) for p in stored]
+            # Some merged particles, to cover the mass-weighted branches
+            for particles in (stored, single):
+                for p in particles[::7]:
+                    p.mass = 2.0
+                    p.self_kernel = 0.4
+            caches = {}, {}
+            for _ in range(5):
+                update(stored, False, cache=caches[0], **settings)
+                update(single, False, cache=caches[1], **settings)
+            self.assertEqual(caches[0]["backend"], "array")
+            self.assertEqual(caches[1]["backend"], "objects")
+            if "reorder_every" in settings:
+                stored.sort(key=lambda p: (p.previous_y_pos, p.previous_x_pos))
+                single.sort(key=lambda p: (p.previous_y_pos, p.previous_x_pos))
+            for a, b in zip(stored, single):
+                self.assertEqual((a.x_pos, a.y_pos, a.x_vel, a.y_vel), (b.x_pos, b.y_pos, b.x_vel, b.y_vel))
+
+    def test_update_objects_backend_on_shared_store(self):
+        array_path = start(-1.0, 1.0, 0.5, 0.05, 80)
+        object_path = start(-1.0, 1.0, 0.5, 0.05, 80)
+        for _ in range(3):
+            update(array_path, False)
+            update(object_path, False, backend="objects")
+        for a, b in zip(array_path, object_path):
+            self.assertEqual((a.x_pos, a.y_vel), (b.x_pos, b.y_vel))
+        with self.assertRaises(ValueError):
+            update(object_path, False, backend="vectorized")
+        # The array path needs one store
+        with self.assertRaises(ValueError):
+            update([Particle(0.0, 0.0), Particle(0.05, 0.0)], False, backend="array")
+
+    def test_set_parameters_reaches_every_config_module(self):
+        import adaptive
+        import array_physics
+        import render
+        previous = set_parameters(REST_DENSITY=get_parameters()["REST_DENSITY"] * 2, SIGMA=0.5)
+        try:
+            for module in (adaptive, array_physics, render):
+                self.assertEqual(module.SIGMA, 0.5)
+                self.assertEqual(module.REST_DENSITY, previous["REST_DENSITY"] * 2)
+        finally:
+            set_parameters(**previous)
+        self.assertEqual(render.REST_DENSITY, previous["REST_DENSITY"])
+
 
 if __name__ == '__main__':
     unittest.main()
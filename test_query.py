@@ -0,0 +1,147 @@
+import random
+import time
+import unittest
+from physics import start, calculate_density, create_grid, update
+from particle_ import Particle, ParticleStore
+from query import SpatialIndex
+from config import Config
+
+# Get config values
+(
+    N_cfg, SIM_W_cfg, BOTTOM_cfg, DAM_cfg, DAM_BREAK_cfg, G_cfg, SPACING_cfg, K_cfg, K_NEAR_cfg,
+    REST_DENSITY_cfg, R_cfg, SIGMA_cfg, MAX_VEL_cfg, WALL_DAMP_cfg, VEL_DAMP_cfg, GRID_CELL_SIZE_cfg
+) = Config().return_config()
+
+
+class _Unscannable(list):
+    def __iter__(self):
+        raise AssertionError("k_nearest iterated over every particle")
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.particles = start(-1.0, 1.0, 0.0, 0.05, 200)
+        for i, p in enumerate(self.particles):
+            p.x_vel = (i % 5) * 0.01
+            p.press = (i % 3) * 0.1
+        self.index = SpatialIndex(self.particles)
+
+    def brute_radius(self, x, y, radius):
+        return {
+            id(p) for p in self.particles
+            if (p.x_pos - x) ** 2 + (p.y_pos - y) ** 2 < radius ** 2
+        }
+
+    def test_in_box_matches_brute_force(self):
+        box = (-0.7, 0.1, -0.2, 0.4)
+        expected = {
+            id(p) for p in self.particles
+            if box[0] <= p.x_pos <= box[2] and box[1] <= p.y_pos <= box[3]
+        }
+        found = {id(p) for p in self.index.in_box(*box)}
+        self.assertEqual(found, expected)
+        self.assertGreater(len(found), 0)
+
+    def test_in_radius_matches_brute_force(self):
+        for x, y, radius in [(-0.5, 0.2, 0.12), (-0.9, 0.0, 0.3), (5.0, 5.0, 0.1)]:
+            found = {id(p) for p in self.index.in_radius(x, y, radius)}
+            self.assertEqual(found, self.brute_radius(x, y, radius))
+
+    def test_k_nearest(self):
+        x, y = -0.33, 0.21
+        nearest = self.index.k_nearest(x, y, 7)
+        expected = sorted(self.particles, key=lambda p: (p.x_pos - x) ** 2 + (p.y_pos - y) ** 2)[:7]
+        self.assertEqual([id(p) for p in nearest], [id(p) for p in expected])
+
+        # Far away query point still finds the requested number of particles
+        self.assertEqual(len(self.index.k_nearest(2.5, 2.5, 3)), 3)
+        self.assertEqual(len(self.index.k_nearest(0.0, 0.0, 10000)), len(self.particles))
+
+    def test_k_nearest_does_not_scan_particles(self):
+        # The search bound comes from the occupied cells, not from a pass over every particle
+        self.index.particles = _Unscannable(self.particles)
+        x, y = 40.0, -25.0
+        nearest = self.index.k_nearest(x, y, 2)
+        expected = sorted(self.particles, key=lambda p: (p.x_pos - x) ** 2 + (p.y_pos - y) ** 2)[:2]
+        self.assertEqual([id(p) for p in nearest], [id(p) for p in expected])
+
+    def test_sample_density_matches_calculate_density(self):
+        grid = create_grid(self.particles, GRID_CELL_SIZE_cfg)
+        calculate_density(self.particles, grid, GRID_CELL_SIZE_cfg)
+        p = self.particles[45]
+        rho, press, x_vel, y_vel = self.index.sample(p.x_pos, p.y_pos)
+        # The probe also sees the particle itself at distance 0 (weight 1)
+        self.assertAlmostEqual(rho, p.rho + 1.0)
+
+    def test_sample_points_batched(self):
+        points = [(-0.5 + 0.01 * i, 0.1) for i in range(30)] + [(2.9, 2.9)]
+        batched = self.index.sample_points(points)
+        self.assertEqual(len(batched), len(points))
+        for point, value in zip(points, batched):
+            self.assertEqual(value, self.index.sample(*point))
+        self.assertEqual(batched[-1], (0.0, 0.0, 0.0, 0.0))
+
+        # Interpolated velocity is a weighted mean of neighbour velocities
+        rho, press, x_vel, y_vel = batched[0]
+        self.assertGreater(rho, 0.0)
+        self.assertTrue(0.0 <= x_vel <= 0.04)
+        self.assertTrue(0.0 <= press <= 0.2)
+
+
+    def test_sample_weights_by_mass(self):
+        # A merged particle of mass 2 reads like two unit particles at its position
+        heavy_store = ParticleStore()
+        heavy = heavy_store.add(0.0, 0.0)
+        heavy.mass = 2.0
+        heavy.x_vel = 0.3
+        heavy_store.add(R_cfg * 0.5, 0.0)
+        unit_store = ParticleStore()
+        for _ in range(2):
+            unit_store.add(0.0, 0.0).x_vel = 0.3
+        unit_store.add(R_cfg * 0.5, 0.0)
+
+        point = (R_cfg * 0.25, 0.01)
+        merged = SpatialIndex(heavy_store.views).sample(*point)
+        separate = SpatialIndex(unit_store.views).sample(*point)
+        for value, expected in zip(merged, separate):
+            self.assertAlmostEqual(value, expected)
+
+    def test_sample_points_same_for_store_and_standalone_particles(self):
+        standalone = []
+        for p in self.particles:
+            copy = Particle(p.x_pos, p.y_pos)
+            copy.x_vel, copy.press = p.x_vel, p.press
+            standalone.append(copy)
+        points = [(-0.9 + 0.037 * i, 0.02 * (i % 9)) for i in range(50)]
+        self.assertEqual(
+            SpatialIndex(standalone).sample_points(points), self.index.sample_points(points)
+        )
+
+    def test_sample_points_faster_than_a_step(self):
+        # 3000 probes inside the fluid of the main scene cost less than one physics step
+        particles = start(-SIM_W_cfg, SIM_W_cfg, BOTTOM_cfg + 1, 0.03, N_cfg)
+        cache = {}
+        for _ in range(10):
+            update(particles, True, cache=cache)
+        rng = random.Random(1)
+        points = [
+            (p.x_pos + rng.uniform(-0.02, 0.02), p.y_pos + rng.uniform(-0.02, 0.02))
+            for p in rng.choices(particles, k=3000)
+        ]
+
+        def best(function) -> float:
+            seconds = []
+            for _ in range(3):
+                begin = time.perf_counter()
+                function()
+                seconds.append(time.perf_counter() - begin)
+            return min(seconds)
+
+        step = best(lambda: update(particles, True, cache=cache))
+        sample = best(lambda: SpatialIndex(particles).sample_points(points))
+        self.assertLess(sample, step)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from array import array
+from physics import start, update
+from particle_ import Particle
+from render import (
+    frame_from_particles, write_frame, read_frame, record, rasterize, encode_png, render,
+    sim_to_screen, PARTICLE_COLOR,
+)
+
+
+class TestRender(unittest.TestCase):
+
+    def test_frame_round_trip(self):
+        particles = start(-1.0, 1.0, 0.5, 0.1, 12)
+        frame = frame_from_particles(particles)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "frame.bin")
+            write_frame(path, frame)
+            self.assertEqual(read_frame(path), frame)
+
+    def test_read_frame_rejects_old_and_truncated_files(self):
+        particles = start(-1.0, 1.0, 0.5, 0.1, 12)
+        frame = frame_from_particles(particles)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "frame.bin")
+            # Headerless three-array frame from before the mass column
+            with open(path, "wb") as file:
+                file.write(struct.pack("<I", 12))
+                for values in frame[:3]:
+                    file.write(values.tobytes())
+            with self.assertRaises(ValueError):
+                read_frame(path)
+
+            write_frame(path, frame)
+            with open(path, "rb") as file:
+                data = file.read()
+            for broken in (data[:-8], data[:6], b"SPHF" + struct.pack("<II", 2, 12) + data[12:]):
+                with open(path, "wb") as file:
+                    file.write(broken)
+                with self.assertRaises(ValueError):
+                    read_frame(path)
+
+    def test_frame_keeps_density(self):
+        particles = start(-1.0, 1.0, 0.5, 0.1, 12)
+        for _ in range(2):
+            particles = update(particles, False)
+        _, _, rho, _ = frame_from_particles(particles)
+        self.assertEqual(list(rho), [particle.rho for particle in particles])
+        self.assertGreater(max(rho), 0.0)
+
+    def test_frame_follows_list_order(self):
+        particles = start(-1.0, 1.0, 0.5, 0.1, 12)
+        shuffled = particles[5:] + particles[:5]
+        frame = frame_from_particles(shuffled)
+        self.assertEqual(list(frame[0]), [particle.visual_x_pos for particle in shuffled])
+        self.assertEqual(frame, frame_from_particles([Particle(p.x_pos, p.y_pos) for p in shuffled]))
+
+    def test_rasterize_draws_particles(self):
+        particles = start(-1.0, 1.0, 0.5, 0.2, 3)
+        frame = frame_from_particles(particles)
+        width, height = 400, 300
+        pixels = rasterize(frame, width, height)
+        self.assertEqual(len(pixels), width * height * 3)
+        x, y = sim_to_screen(particles[0].x_pos, particles[0].y_pos)
+        offset = 3 * (y * width + x)
+        self.assertEqual(tuple(pixels[offset:offset + 3]), PARTICLE_COLOR)
+        self.assertEqual(tuple(pixels[0:3]), (0, 0, 0))
+
+        # The density field lights up pixels around, but not under, the particles
+        with_field = rasterize(frame, width, height, density_field=True)
+        offset = 3 * (y * width + x + 6)
+        self.assertNotEqual(tuple(with_field[offset:offset + 3]), (0, 0, 0))
+        self.assertEqual(tuple(pixels[offset:offset + 3]), (0, 0, 0))
+
+    def test_density_field_weights_by_mass(self):
+        # A merged particle of mass 2 shades the field like two unit particles
+        merged = (array("d", [0.0]), array("d", [1.0]), array("d", [0.0]), array("d", [2.0]))
+        separate = (
+            array("d", [0.0, 0.0]), array("d", [1.0, 1.0]), array("d", [0.0, 0.0]), array("d", [1.0, 1.0]),
+        )
+        width, height = 400, 300
+        self.assertEqual(
+            rasterize(merged, width, height, density_field=True),
+            rasterize(separate, width, height, density_field=True),
+        )
+
+    def test_encode_png(self):
+        width, height = 4, 2
+        pixels = bytes(range(width * height * 3))
+        data = encode_png(pixels, width, height)
+        self.assertTrue(data.startswith(b"\x89PNG\r\n\x1a\n"))
+        self.assertEqual(struct.unpack(">II", data[16:24]), (width, height))
+        idat_length = struct.unpack(">I", data[33:37])[0]
+        raw = zlib.decompress(data[41:41 + idat_length])
+        self.assertEqual(raw, b"\x00" + pixels[:12] + b"\x00" + pixels[12:])
+
+    def test_render_preserves_frame_order(self):
+        width, height = 200, 150
+        frames = []
+        for i in range(6):
+            particles = start(-2.9 + 0.3 * i, 3.0, 1.0, 0.3, 2)
+            frames.append(frame_from_particles(particles))
+        expected = b"".join(bytes(rasterize(frame, width, height)) for frame in frames)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "frames.rgb")
+            count = render(frames, path, "raw", width, height, workers=2, max_pending=2)
+            self.assertEqual(count, len(frames))
+            with open(path, "rb") as file:
+                self.assertEqual(file.read(), expected)
+
+            paths = record(os.path.join(directory, "saved"), steps=2, particles=start(-1.0, 1.0, 0.5, 0.1, 5))
+            count = render(paths, os.path.join(directory, "png"), "png", width, height, workers=2)
+            self.assertEqual(count, 2)
+            self.assertEqual(sorted(os.listdir(os.path.join(directory, "png"))), ["frame_00000.png", "frame_00001.png"])
+
+
+if __name__ == '__main__':
+    unittest.main()
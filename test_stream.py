@@ -0,0 +1,132 @@
+import socket
+import time
+import unittest
+from physics import start, update
+from stream import (
+    StreamServer, StreamClient, encode_frame, decode_frame, as_numpy, DEFAULT_FIELDS,
+)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+
+class TestStream(unittest.TestCase):
+
+    def setUp(self):
+        self.particles = update(start(-1.0, 1.0, 0.5, 0.1, 10), False)
+        for i, p in enumerate(self.particles):
+            p.x_vel = i * 0.25
+
+    def test_encode_decode_round_trip(self):
+        message = encode_frame(self.particles, 7)
+        payload = b"".join(bytes(part) for part in message[1:])
+        self.assertEqual(len(payload), int.from_bytes(message[0], "little"))
+        frame, fields = decode_frame(payload)
+        self.assertEqual(frame, 7)
+        self.assertEqual(tuple(fields), DEFAULT_FIELDS)
+        self.assertEqual(list(fields["x_vel"]), [i * 0.25 for i in range(10)])
+        self.assertAlmostEqual(fields["x_pos"][3], self.particles[3].x_pos, places=6)
+
+        # The density of the last step comes through, not a cleared column
+        self.assertGreater(max(fields["rho"]), 0.0)
+        for value, p in zip(fields["rho"], self.particles):
+            self.assertAlmostEqual(value, p.rho, places=5)
+
+    def test_as_numpy(self):
+        try:
+            import numpy as np
+        except ImportError:
+            self.skipTest("numpy is not installed")
+        _, fields = decode_frame(b"".join(bytes(part) for part in encode_frame(self.particles, 0)[1:]))
+        arrays = as_numpy(fields)
+        self.assertEqual(tuple(arrays), DEFAULT_FIELDS)
+        self.assertEqual(arrays["x_vel"].dtype, np.float32)
+        self.assertEqual(arrays["x_vel"].tolist(), list(fields["x_vel"]))
+
+    def test_server_streams_with_decimation(self):
+        server = StreamServer(fields=("x_pos", "x_vel")).start()
+        try:
+            every = StreamClient("127.0.0.1", server.port, timeout=5)
+            third = StreamClient("127.0.0.1", server.port, decimation=3, timeout=5)
+            wait_for(lambda: len(server.subscribers) == 2)
+
+            received_every = []
+            received_third = []
+            for frame in range(7):
+                server.publish(self.particles, frame)
+                received_every.append(every.receive()[0])
+                if frame % 3 == 0:
+                    frame_number, fields = third.receive()
+                    received_third.append(frame_number)
+                    self.assertEqual(tuple(fields), ("x_pos", "x_vel"))
+            self.assertEqual(received_every, list(range(7)))
+            self.assertEqual(received_third, [0, 3, 6])
+            every.close()
+            third.close()
+        finally:
+            server.stop()
+
+    def test_stop_closes_clients_without_decimation(self):
+        server = StreamServer().start()
+        # Connected, but never sends its decimation
+        silent = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+        try:
+            wait_for(lambda: len(server._tasks) == 1)
+            self.assertEqual(server.subscribers, [])
+            tasks = set(server._tasks)
+            begin = time.monotonic()
+            server.stop()
+            self.assertLess(time.monotonic() - begin, 5.0)
+            self.assertEqual(server._tasks, set())
+            self.assertEqual(silent.recv(1), b"")
+            # Cancellation reaches the connection task instead of being swallowed
+            self.assertTrue(all(task.cancelled() for task in tasks))
+        finally:
+            silent.close()
+
+    def test_stop_cancels_subscriber_tasks(self):
+        server = StreamServer().start()
+        client = StreamClient("127.0.0.1", server.port, timeout=5)
+        try:
+            wait_for(lambda: len(server.subscribers) == 1)
+            tasks = set(server._tasks)
+            server.stop()
+            self.assertTrue(tasks and all(task.cancelled() for task in tasks))
+            self.assertEqual(server.subscribers, [])
+            with self.assertRaises(ConnectionError):
+                client.receive()
+        finally:
+            client.close()
+
+    def test_slow_client_drops_frames(self):
+        server = StreamServer().start()
+        try:
+            client = StreamClient("127.0.0.1", server.port, timeout=5)
+            wait_for(lambda: len(server.subscribers) == 1)
+            subscriber = server.subscribers[0]
+            # Publishing never blocks; the client only reads after the burst
+            big = start(-3.0, 3.0, 0.0, 0.01, 20000)
+            begin = time.monotonic()
+            for frame in range(50):
+                server.publish(big, frame)
+            self.assertLess(time.monotonic() - begin, 5.0)
+
+            frames = []
+            while not frames or frames[-1] != 49:
+                frames.append(client.receive()[0])
+            self.assertEqual(frames, sorted(frames))
+            self.assertLess(len(frames), 50)
+            wait_for(lambda: subscriber.sent == len(frames))
+            self.assertEqual(subscriber.sent + subscriber.dropped, 50)
+            client.close()
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()